@@ -3,11 +3,12 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext as _
 
 from ezpunishments.core import models
+from ezpunishments.core.mojang import normalize_uuid
 
 
 class UserAdmin(BaseUserAdmin):
     ordering = ["id"]
-    list_display = ["username", "mc_uuid"]
+    list_display = ["username", "mc_uuid_hex"]
     fieldsets = (
         (None, {"fields": ("username", "password")}),
         (_("MC Info"), {"fields": ("mc_uuid",)}),
@@ -21,6 +22,12 @@ class UserAdmin(BaseUserAdmin):
         ),
     )
 
+    def mc_uuid_hex(self, obj):
+        return normalize_uuid(obj.mc_uuid)
+
+    mc_uuid_hex.short_description = _("MC UUID")
+
 
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Punishment)
+admin.site.register(models.PunishmentArchive)
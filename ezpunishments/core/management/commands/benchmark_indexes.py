@@ -0,0 +1,130 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ezpunishments.core.models import Punishment
+
+
+class Command(BaseCommand):
+    """Django command to compare punishment query plans with and without indexes
+
+    Rows are seeded inside a transaction that is rolled back at the end. The
+    indexes are dropped while the "before" queries run, which locks the
+    punishment table, so only run this against a development database.
+    """
+
+    help = "Benchmark punishment queries before and after the model indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rows']} punishments...")
+            sample = self.seed(options["rows"])
+            indexes = Punishment._meta.indexes
+
+            with connection.schema_editor() as schema_editor:
+                for index in indexes:
+                    schema_editor.remove_index(Punishment, index)
+            self.analyze()
+            self.stdout.write(self.style.WARNING("Before"))
+            before = self.run_queries(sample, options)
+
+            with connection.schema_editor() as schema_editor:
+                for index in indexes:
+                    schema_editor.add_index(Punishment, index)
+            self.analyze()
+            self.stdout.write(self.style.WARNING("After"))
+            after = self.run_queries(sample, options)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<20}{'before ms':>12}{'after ms':>12}")
+        for name in before:
+            self.stdout.write(f"{name:<20}{before[name]:>12.3f}{after[name]:>12.3f}")
+
+    def seed(self, rows):
+        """Seeds rows synthetic punishments and returns values to query for"""
+        now = timezone.now()
+        staff = [(f"staff{i}", uuid.uuid4()) for i in range(20)]
+        punishments = []
+        for i in range(rows):
+            punished_by, punished_by_uuid = random.choice(staff)
+            punishments.append(
+                Punishment(
+                    mc_username=f"player{i}",
+                    mc_uuid=uuid.uuid4(),
+                    reason="Benchmark",
+                    punished_by=punished_by,
+                    punished_by_uuid=punished_by_uuid,
+                    is_active=random.random() < 0.1,
+                    expires=now
+                    + timedelta(minutes=random.randint(-(10**6), 10**6)),
+                )
+            )
+        Punishment.objects.bulk_create(punishments, batch_size=5000)
+        target = punishments[rows // 2]
+
+        return {
+            "mc_uuid": target.mc_uuid,
+            "mc_username": target.mc_username,
+            "punished_by": target.punished_by,
+            "punished_by_uuid": target.punished_by_uuid,
+        }
+
+    def queries(self, sample):
+        now = timezone.now()
+        return {
+            "ban check": Punishment.objects.filter(
+                mc_uuid=sample["mc_uuid"], is_active=True, expires__gt=now
+            ).order_by("-expires")[:1],
+            "by uuid": Punishment.objects.filter(mc_uuid=sample["mc_uuid"]).order_by(
+                "-date_punished"
+            )[:50],
+            "by username": Punishment.objects.filter(
+                mc_username=sample["mc_username"]
+            ).order_by("-date_punished")[:50],
+            "by punisher": Punishment.objects.filter(
+                punished_by=sample["punished_by"]
+            ).order_by("-date_punished")[:50],
+            "by punisher uuid": Punishment.objects.filter(
+                punished_by_uuid=sample["punished_by_uuid"]
+            ).order_by("-date_punished")[:50],
+            "active expiring": Punishment.objects.filter(
+                is_active=True, expires__gt=now
+            ).order_by("expires")[:50],
+        }
+
+    def run_queries(self, sample, options):
+        """Runs each query repeat times, returning the best time in ms"""
+        timings = {}
+        for name, queryset in self.queries(sample).items():
+            if options["verbosity"] > 1:
+                self.stdout.write(self.style.NOTICE(name))
+                self.stdout.write(queryset.explain(analyze=True))
+            else:
+                lines = queryset.explain().splitlines()
+                scan = next((line for line in lines if "Scan" in line), lines[0])
+                self.stdout.write(f"{name}: {scan.strip(' ->')}")
+            best = None
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                list(queryset.all())
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        return timings
+
+    def analyze(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Punishment._meta.db_table}")
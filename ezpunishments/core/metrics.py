@@ -0,0 +1,241 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def escape_label(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label(value)}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for metrics kept in process and exposed in Prometheus text format"""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            labels = tuple(zip(self.labelnames, values))
+            lines.extend(self.render_sample(labels, value))
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels=(), amount=1):
+        """Adds amount to the count for labels, given in labelnames order"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render_sample(self, key, value):
+        return [f"{self.name}{format_labels(key)} {format_value(value)}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        """Records value for labels, given in labelnames order"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * len(self.buckets), 0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render_sample(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = format_labels(key + (("le", format_value(float(bound))),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = format_labels(key + (("le", "+Inf"),))
+        lines.append(f"{self.name}_bucket{labels} {count}")
+        lines.append(f"{self.name}_sum{format_labels(key)} {format_value(total)}")
+        lines.append(f"{self.name}_count{format_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+VIEW_LABELS = ("view", "method")
+
+requests_total = REGISTRY.register(
+    Counter(
+        "ezpunishments_requests_total",
+        "Requests handled by each view",
+        VIEW_LABELS + ("status",),
+    )
+)
+request_seconds = REGISTRY.register(
+    Histogram(
+        "ezpunishments_request_duration_seconds",
+        "Wall time spent handling each request",
+        VIEW_LABELS,
+    )
+)
+db_queries = REGISTRY.register(
+    Histogram(
+        "ezpunishments_request_db_queries",
+        "Database queries run by each request",
+        VIEW_LABELS,
+        COUNT_BUCKETS,
+    )
+)
+db_seconds = REGISTRY.register(
+    Histogram(
+        "ezpunishments_request_db_seconds",
+        "Time each request spent waiting on the database",
+        VIEW_LABELS,
+    )
+)
+serialize_seconds = REGISTRY.register(
+    Histogram(
+        "ezpunishments_request_serialize_seconds",
+        "Time each request spent serializing and rendering data",
+        VIEW_LABELS,
+    )
+)
+mojang_calls = REGISTRY.register(
+    Histogram(
+        "ezpunishments_request_mojang_calls",
+        "Mojang API calls made by each request",
+        VIEW_LABELS,
+        COUNT_BUCKETS,
+    )
+)
+mojang_seconds = REGISTRY.register(
+    Histogram(
+        "ezpunishments_request_mojang_seconds",
+        "Time each request spent waiting on the Mojang API",
+        VIEW_LABELS,
+    )
+)
+
+
+class RequestTimings:
+    """Call counts and seconds spent on each kind of work during one request"""
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.seconds[name] = self.seconds.get(name, 0) + seconds
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Database execute wrapper that times every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record("db", time.perf_counter() - start)
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request():
+    """Starts collecting timings, returning them and a token for end_request()"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """Adds the time spent in the block to the current request's timings"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of timer()"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
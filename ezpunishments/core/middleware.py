@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from ezpunishments.core import metrics
+
+
+class RequestMetricsMiddleware:
+    """Times each request and records where the time went
+
+    Database queries, serialization and Mojang calls are timed while the
+    request is handled. The totals go into the Prometheus histograms for
+    the view and, unless METRICS_SERVER_TIMING is off, a Server-Timing
+    header. Should be the first middleware so the wall time covers the rest.
+    """
+
+    # Anything else is labelled "other" so clients can't add label values
+    known_methods = frozenset(
+        ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+    )
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        duration = time.perf_counter() - start
+
+        self.observe(request, response, timings, duration)
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = self.server_timing(timings, duration)
+
+        return response
+
+    def get_view_name(self, request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else "unmatched"
+
+    def observe(self, request, response, timings, duration):
+        method = request.method if request.method in self.known_methods else "other"
+        labels = (self.get_view_name(request), method)
+        counts, seconds = timings.counts, timings.seconds
+        metrics.requests_total.inc(labels + (response.status_code,))
+        metrics.request_seconds.observe(duration, labels)
+        metrics.db_queries.observe(counts.get("db", 0), labels)
+        metrics.db_seconds.observe(seconds.get("db", 0), labels)
+        metrics.serialize_seconds.observe(seconds.get("serialize", 0), labels)
+        metrics.mojang_calls.observe(counts.get("mojang", 0), labels)
+        metrics.mojang_seconds.observe(seconds.get("mojang", 0), labels)
+
+    def server_timing(self, timings, duration):
+        entries = [f"total;dur={duration * 1000:.1f}"]
+        for name in ("db", "serialize", "mojang"):
+            if name in timings.counts:
+                entry = f"{name};dur={timings.seconds[name] * 1000:.1f}"
+                if name != "serialize":
+                    entry += f';desc="{timings.counts[name]} calls"'
+                entries.append(entry)
+        return ", ".join(entries)
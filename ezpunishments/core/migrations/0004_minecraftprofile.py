@@ -0,0 +1,30 @@
+# Generated by Django 3.1.14 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_auto_20200924_0030"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MinecraftProfile",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("username", models.CharField(max_length=16, unique=True)),
+                ("mc_uuid", models.CharField(max_length=255)),
+                ("last_resolved", models.DateTimeField()),
+            ],
+        ),
+    ]
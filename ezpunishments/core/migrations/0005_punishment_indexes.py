@@ -0,0 +1,54 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_minecraftprofile"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                fields=["mc_uuid", "-date_punished"], name="punishment_uuid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                fields=["mc_username", "-date_punished"], name="punishment_username_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                fields=["punished_by", "-date_punished"], name="punishment_punisher_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                fields=["punished_by_uuid", "-date_punished"],
+                name="punishment_punisher_uuid_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                condition=models.Q(is_active=True),
+                fields=["mc_uuid", "expires"],
+                name="punishment_active_uuid_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                condition=models.Q(is_active=True),
+                fields=["expires"],
+                name="punishment_active_expires_idx",
+            ),
+        ),
+    ]
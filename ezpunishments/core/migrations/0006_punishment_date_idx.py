@@ -0,0 +1,19 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_punishment_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                fields=["-date_punished", "-id"], name="punishment_date_idx"
+            ),
+        ),
+    ]
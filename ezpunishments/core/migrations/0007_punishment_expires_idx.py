@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_punishment_date_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(fields=["expires", "id"], name="punishment_expires_idx"),
+        ),
+    ]
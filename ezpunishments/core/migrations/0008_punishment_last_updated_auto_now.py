@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_punishment_expires_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="punishment",
+            name="last_updated",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_punishment_last_updated_auto_now"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PunishmentTombstone",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("punishment_id", models.IntegerField()),
+                ("mc_uuid", models.CharField(max_length=255)),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="punishment",
+            index=models.Index(
+                fields=["last_updated", "id"], name="punishment_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishmenttombstone",
+            index=models.Index(
+                fields=["deleted_at", "id"], name="tombstone_deleted_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_punishment_changes"),
+    ]
+
+    # Postgres converts the 32 character hex strings in place with
+    # ALTER COLUMN ... TYPE uuid USING column::uuid, blank strings can't be
+    # cast so they're cleared first
+    operations = [
+        migrations.RunSQL(
+            "UPDATE core_punishment SET removed_by_uuid = NULL "
+            "WHERE removed_by_uuid = ''",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="minecraftprofile",
+            name="mc_uuid",
+            field=models.UUIDField(),
+        ),
+        migrations.AlterField(
+            model_name="punishment",
+            name="mc_uuid",
+            field=models.UUIDField(),
+        ),
+        migrations.AlterField(
+            model_name="punishment",
+            name="punished_by_uuid",
+            field=models.UUIDField(),
+        ),
+        migrations.AlterField(
+            model_name="punishment",
+            name="removed_by_uuid",
+            field=models.UUIDField(default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name="punishmenttombstone",
+            name="mc_uuid",
+            field=models.UUIDField(),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="mc_uuid",
+            field=models.UUIDField(unique=True),
+        ),
+    ]
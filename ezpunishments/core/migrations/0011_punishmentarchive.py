@@ -0,0 +1,53 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_mc_uuid_uuidfield"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PunishmentArchive",
+            fields=[
+                ("id", models.IntegerField(primary_key=True, serialize=False)),
+                ("mc_username", models.CharField(max_length=16)),
+                ("mc_uuid", models.UUIDField()),
+                ("reason", models.CharField(max_length=255)),
+                ("proof", models.CharField(max_length=255, null=True)),
+                ("punished_by", models.CharField(max_length=16)),
+                ("punished_by_uuid", models.UUIDField()),
+                (
+                    "removed_by",
+                    models.CharField(default=None, max_length=16, null=True),
+                ),
+                ("removed_by_uuid", models.UUIDField(default=None, null=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("expires", models.DateTimeField()),
+                ("date_punished", models.DateTimeField()),
+                ("last_updated", models.DateTimeField()),
+                ("archived_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="punishmentarchive",
+            index=models.Index(
+                fields=["-date_punished", "-id"], name="archive_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishmentarchive",
+            index=models.Index(
+                fields=["mc_uuid", "-date_punished"], name="archive_uuid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="punishmentarchive",
+            index=models.Index(
+                fields=["mc_username", "-date_punished"], name="archive_username_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_punishmentarchive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PunishmentExpiryStats",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("active", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PunishmentDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("punished_by_uuid", models.UUIDField()),
+                ("punished_by", models.CharField(max_length=16)),
+                ("created", models.IntegerField(default=0)),
+                ("revoked", models.IntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("day", "punished_by_uuid")},
+            },
+        ),
+    ]
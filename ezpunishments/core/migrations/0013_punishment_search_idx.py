@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_punishment_stats"),
+    ]
+
+    # Expression indexes can't be declared in Meta.indexes before Django 3.2.
+    # The expression must stay identical to punishment.search.document().
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX punishment_search_idx ON core_punishment USING gin "
+            "(to_tsvector('english'::regconfig, "
+            "COALESCE(reason, '') || ' ' || COALESCE(proof, '')))",
+            "DROP INDEX punishment_search_idx",
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 3.1.14 on 2026-10-18 12:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_punishment_search_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="punishment",
+            name="mc_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="punishment",
+            name="punished_by_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="punishmentarchive",
+            name="mc_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="punishmentarchive",
+            name="punished_by_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="punishmenttombstone",
+            name="mc_uuid",
+            field=models.UUIDField(null=True),
+        ),
+        migrations.CreateModel(
+            name="UUIDResolutionJob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("failed", "Failed")],
+                        default="pending",
+                        max_length=8,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_error", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "punishment",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uuid_resolution",
+                        to="core.punishment",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="uuidresolutionjob",
+            index=models.Index(
+                fields=["status", "run_after"], name="resolution_due_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_uuid_resolution"),
+    ]
+
+    # The expression must stay identical to punishment.search.document().
+    operations = [
+        migrations.RunSQL(
+            [
+                "DROP INDEX punishment_search_idx",
+                "CREATE INDEX punishment_search_idx ON core_punishment USING gin "
+                "(to_tsvector('english'::regconfig, "
+                "COALESCE(reason, '') || ' ' || "
+                "COALESCE(regexp_replace(proof, '[/:?#&=.]+', ' ', 'g'), '')))",
+            ],
+            [
+                "DROP INDEX punishment_search_idx",
+                "CREATE INDEX punishment_search_idx ON core_punishment USING gin "
+                "(to_tsvector('english'::regconfig, "
+                "COALESCE(reason, '') || ' ' || COALESCE(proof, '')))",
+            ],
+        ),
+    ]
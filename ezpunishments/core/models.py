@@ -1,22 +1,29 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
+from django.utils import timezone
 from django.utils.timezone import make_aware
 
-import requests
+from ezpunishments.core.mojang import get_resolver
 
 
 def get_mc_uuid(username):
     """Gets the Minecraft UUID for a username"""
-    url = f"https://api.mojang.com/users/profiles/minecraft/{username}"
-    res = requests.get(url)
-    if res.status_code == 204:
-        raise ValueError("Users must have a valid MC username")
-    else:
-        return res.json().get("id")
+    return get_resolver().resolve(username)
+
+
+def get_mc_uuids(usernames):
+    """Gets the Minecraft UUIDs for many usernames in as few calls as possible"""
+    return get_resolver().resolve_many(usernames)
+
+
+def get_known_mc_uuids(usernames):
+    """Gets the Minecraft UUIDs already known for usernames, without calling Mojang"""
+    return get_resolver().resolve_known(usernames)
 
 
 class UserManager(BaseUserManager):
@@ -45,7 +52,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     """Custom user model that supports mc_uuid"""
 
     username = models.CharField(max_length=16, unique=True)
-    mc_uuid = models.CharField(max_length=255, unique=True)
+    mc_uuid = models.UUIDField(unique=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
@@ -78,21 +85,211 @@ class PunishmentManager(models.Manager):
 
         return punishment
 
+    def create_pending(self, mc_username, reason, punished_by, expires, **extra_fields):
+        """Creates and saves a new Punishment without waiting on Mojang
+
+        UUIDs that are already known are filled in straight away, otherwise a
+        UUIDResolutionJob is queued to backfill them.
+        """
+        if not mc_username or not reason or not punished_by or not expires:
+            raise ValueError(
+                "Punishments must have user, reason, punished by and expires fields"
+            )
+        known = get_known_mc_uuids([mc_username, punished_by])
+        if not expires.tzinfo:
+            expires = make_aware(expires)
+        punishment = self.model(
+            mc_username=mc_username,
+            mc_uuid=known.get(mc_username),
+            reason=reason,
+            punished_by=punished_by,
+            punished_by_uuid=known.get(punished_by),
+            expires=expires,
+            **extra_fields,
+        )
+        with transaction.atomic(using=self.db):
+            punishment.save(using=self._db)
+            if punishment.mc_uuid is None or punishment.punished_by_uuid is None:
+                UUIDResolutionJob.objects.create(punishment=punishment)
+
+        return punishment
+
+    def create_many(self, punishments, mc_uuids=None):
+        """Creates and saves many Punishments with one batch of UUID lookups
+
+        mc_uuids can map the usernames to UUIDs already looked up by the
+        caller, to skip the lookup.
+        """
+        required = ("mc_username", "reason", "punished_by", "expires")
+        if any(not data.get(field) for data in punishments for field in required):
+            raise ValueError(
+                "Punishments must have user, reason, punished by and expires fields"
+            )
+        if mc_uuids is None:
+            mc_uuids = get_mc_uuids(
+                [data["mc_username"] for data in punishments]
+                + [data["punished_by"] for data in punishments]
+            )
+        objs = []
+        for data in punishments:
+            data = dict(data)
+            if (
+                data["mc_username"] not in mc_uuids
+                or data["punished_by"] not in mc_uuids
+            ):
+                raise ValueError("Users must have a valid MC username")
+            if not data["expires"].tzinfo:
+                data["expires"] = make_aware(data["expires"])
+            objs.append(
+                self.model(
+                    mc_uuid=mc_uuids[data["mc_username"]],
+                    punished_by_uuid=mc_uuids[data["punished_by"]],
+                    **data,
+                )
+            )
+        with transaction.atomic(using=self.db):
+            self.bulk_create(objs, batch_size=settings.PUNISHMENT_BULK_BATCH_SIZE)
+
+        return objs
+
 
 class Punishment(models.Model):
     """Punishment object"""
 
     mc_username = models.CharField(max_length=16)
-    mc_uuid = models.CharField(max_length=255)
+    mc_uuid = models.UUIDField(null=True)
     reason = models.CharField(max_length=255)
     proof = models.CharField(max_length=255, null=True)
     punished_by = models.CharField(max_length=16)
-    punished_by_uuid = models.CharField(max_length=255)
+    punished_by_uuid = models.UUIDField(null=True)
     removed_by = models.CharField(max_length=16, null=True, default=None)
-    removed_by_uuid = models.CharField(max_length=255, null=True, default=None)
+    removed_by_uuid = models.UUIDField(null=True, default=None)
     is_active = models.BooleanField(default=True)
     expires = models.DateTimeField()
     date_punished = models.DateTimeField(auto_now_add=True)
-    last_updated = models.DateTimeField(auto_now_add=True)
+    last_updated = models.DateTimeField(auto_now=True)
 
     objects = PunishmentManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-date_punished", "-id"], name="punishment_date_idx"),
+            models.Index(fields=["expires", "id"], name="punishment_expires_idx"),
+            models.Index(fields=["last_updated", "id"], name="punishment_updated_idx"),
+            models.Index(
+                fields=["mc_uuid", "-date_punished"], name="punishment_uuid_idx"
+            ),
+            models.Index(
+                fields=["mc_username", "-date_punished"],
+                name="punishment_username_idx",
+            ),
+            models.Index(
+                fields=["punished_by", "-date_punished"],
+                name="punishment_punisher_idx",
+            ),
+            models.Index(
+                fields=["punished_by_uuid", "-date_punished"],
+                name="punishment_punisher_uuid_idx",
+            ),
+            models.Index(
+                fields=["mc_uuid", "expires"],
+                name="punishment_active_uuid_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["expires"],
+                name="punishment_active_expires_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
+
+class PunishmentArchive(models.Model):
+    """Inactive or long expired punishment moved out of the live table"""
+
+    id = models.IntegerField(primary_key=True)
+    mc_username = models.CharField(max_length=16)
+    mc_uuid = models.UUIDField(null=True)
+    reason = models.CharField(max_length=255)
+    proof = models.CharField(max_length=255, null=True)
+    punished_by = models.CharField(max_length=16)
+    punished_by_uuid = models.UUIDField(null=True)
+    removed_by = models.CharField(max_length=16, null=True, default=None)
+    removed_by_uuid = models.UUIDField(null=True, default=None)
+    is_active = models.BooleanField(default=True)
+    expires = models.DateTimeField()
+    date_punished = models.DateTimeField()
+    last_updated = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-date_punished", "-id"], name="archive_date_idx"),
+            models.Index(fields=["mc_uuid", "-date_punished"], name="archive_uuid_idx"),
+            models.Index(
+                fields=["mc_username", "-date_punished"], name="archive_username_idx"
+            ),
+        ]
+
+
+class PunishmentTombstone(models.Model):
+    """Record of a deleted punishment, kept for the changes feed"""
+
+    punishment_id = models.IntegerField()
+    mc_uuid = models.UUIDField(null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_idx"),
+        ]
+
+
+class UUIDResolutionJob(models.Model):
+    """Queued lookup of the UUIDs a punishment was created without"""
+
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (FAILED, "Failed")]
+
+    punishment = models.OneToOneField(
+        Punishment, on_delete=models.CASCADE, related_name="uuid_resolution"
+    )
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="resolution_due_idx"),
+        ]
+
+
+class PunishmentDailyStats(models.Model):
+    """Punishments one moderator issued and had revoked on one day"""
+
+    day = models.DateField()
+    punished_by_uuid = models.UUIDField()
+    punished_by = models.CharField(max_length=16)
+    created = models.IntegerField(default=0)
+    revoked = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("day", "punished_by_uuid")
+
+
+class PunishmentExpiryStats(models.Model):
+    """Number of active punishments expiring on one day"""
+
+    day = models.DateField(unique=True)
+    active = models.IntegerField(default=0)
+
+
+class MinecraftProfile(models.Model):
+    """Last known UUID for a Minecraft username, shared between workers"""
+
+    username = models.CharField(max_length=16, unique=True)
+    mc_uuid = models.UUIDField()
+    last_resolved = models.DateTimeField()
@@ -0,0 +1,384 @@
+import contextvars
+import re
+import threading
+import uuid
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+from rest_framework.exceptions import APIException
+
+from ezpunishments.core import metrics
+
+
+VALID_USERNAME = re.compile(r"^\w{1,16}$")
+
+
+def normalize_uuid(value):
+    """Returns value as undashed lowercase hex, raising ValueError if invalid"""
+    return uuid.UUID(str(value)).hex
+
+
+def chunked(items, size):
+    """Splits items into lists of at most size items"""
+    iterator = iter(items)
+    return list(iter(lambda: list(islice(iterator, size)), []))
+
+
+class LRUCache:
+    """Thread safe in-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Stores value under key, evicting the least recently used entry"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MojangUnavailable(APIException):
+    """Raised when the Mojang API can't be reached or is unhealthy
+
+    Views that don't handle it answer with a 503 instead of a server error.
+    """
+
+    status_code = 503
+    default_detail = "Unable to resolve MC usernames, try again later"
+    default_code = "mojang_unavailable"
+
+
+class CircuitBreaker:
+    """Fails fast after repeated errors until a cool down has passed
+
+    Once failure_threshold consecutive failures have been recorded the
+    breaker opens and rejects calls for reset_timeout seconds. After that a
+    single trial call is let through; success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """Returns True if a call may be attempted"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half open, let one trial call through and hold the rest back
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class UUIDResolver:
+    """Resolves Minecraft usernames to UUIDs
+
+    Lookups go through an in-process LRU first, then the shared
+    MinecraftProfile table, and only hit the Mojang API on a miss. If a
+    stale profile can't be refreshed the last known UUID is served instead.
+    """
+
+    def __init__(
+        self,
+        api_url=None,
+        cache_size=None,
+        cache_ttl=None,
+        profile_ttl=None,
+        timeout=None,
+        breaker=None,
+    ):
+        self.api_url = (api_url or settings.MOJANG_API_URL).rstrip("/")
+        self.cache = LRUCache(
+            cache_size or settings.MOJANG_UUID_CACHE_SIZE,
+            cache_ttl or settings.MOJANG_UUID_CACHE_TTL,
+        )
+        self.profile_ttl = timedelta(seconds=profile_ttl or settings.MOJANG_PROFILE_TTL)
+        self.timeout = timeout or (
+            settings.MOJANG_CONNECT_TIMEOUT,
+            settings.MOJANG_READ_TIMEOUT,
+        )
+        self.breaker = breaker or CircuitBreaker(
+            settings.MOJANG_BREAKER_THRESHOLD, settings.MOJANG_BREAKER_RESET
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=settings.MOJANG_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def resolve(self, username):
+        """Returns the UUID for username, raising ValueError if it doesn't exist"""
+        key = username.lower()
+        mc_uuid = self.cache.get(key)
+        if mc_uuid:
+            return mc_uuid
+
+        profile = self._load_profile(key)
+        if profile and profile.last_resolved > timezone.now() - self.profile_ttl:
+            mc_uuid = normalize_uuid(profile.mc_uuid)
+            self.cache.set(key, mc_uuid)
+            return mc_uuid
+
+        try:
+            mc_uuid = self.fetch(username)
+        except MojangUnavailable:
+            if profile:
+                return normalize_uuid(profile.mc_uuid)
+            raise
+        self._store_profile(key, mc_uuid)
+        self.cache.set(key, mc_uuid)
+
+        return mc_uuid
+
+    def resolve_many(self, usernames):
+        """Returns a dict mapping each resolvable username to its UUID
+
+        Names are deduplicated case insensitively and any that aren't cached
+        are fetched through Mojang's bulk endpoint. Usernames that don't
+        exist are left out of the result.
+        """
+        resolved = {}
+        pending = {}
+        for username in usernames:
+            key = username.lower()
+            if key in resolved or key in pending:
+                continue
+            mc_uuid = self.cache.get(key)
+            if mc_uuid:
+                resolved[key] = mc_uuid
+            else:
+                pending[key] = username
+
+        if pending:
+            profile_model = apps.get_model("core", "MinecraftProfile")
+            profiles = profile_model.objects.in_bulk(
+                list(pending), field_name="username"
+            )
+            fresh_after = timezone.now() - self.profile_ttl
+            stale = []
+            for key, username in pending.items():
+                profile = profiles.get(key)
+                if profile and profile.last_resolved > fresh_after:
+                    resolved[key] = normalize_uuid(profile.mc_uuid)
+                    self.cache.set(key, resolved[key])
+                else:
+                    stale.append(username)
+
+            if stale:
+                try:
+                    fetched = self.fetch_many(stale)
+                except MojangUnavailable:
+                    # Serve the last known UUIDs, but only if we know them all
+                    if any(name.lower() not in profiles for name in stale):
+                        raise
+                    for name in stale:
+                        resolved[name.lower()] = normalize_uuid(
+                            profiles[name.lower()].mc_uuid
+                        )
+                else:
+                    self._store_profiles(fetched, profiles)
+                    for key, mc_uuid in fetched.items():
+                        resolved[key] = mc_uuid
+                        self.cache.set(key, mc_uuid)
+
+        return {
+            username: resolved[username.lower()]
+            for username in usernames
+            if username.lower() in resolved
+        }
+
+    def resolve_known(self, usernames):
+        """Returns UUIDs for the usernames that are cached, without calling Mojang
+
+        Stored profiles are used however old they are, since a stale UUID is
+        almost always still right. Unknown usernames are left out.
+        """
+        resolved = {}
+        missing = []
+        for username in usernames:
+            mc_uuid = self.cache.get(username.lower())
+            if mc_uuid:
+                resolved[username.lower()] = mc_uuid
+            else:
+                missing.append(username.lower())
+
+        if missing:
+            profile_model = apps.get_model("core", "MinecraftProfile")
+            profiles = profile_model.objects.in_bulk(missing, field_name="username")
+            for key, profile in profiles.items():
+                resolved[key] = normalize_uuid(profile.mc_uuid)
+
+        return {
+            username: resolved[username.lower()]
+            for username in usernames
+            if username.lower() in resolved
+        }
+
+    def fetch_many(self, usernames):
+        """Fetches UUIDs for usernames from the Mojang bulk profile endpoint
+
+        Returns a dict keyed by lowercased username. Requests are split into
+        chunks of MOJANG_BATCH_SIZE names and run with bounded concurrency.
+        """
+        size = settings.MOJANG_BATCH_SIZE
+        chunks = chunked(usernames, size)
+        workers = min(settings.MOJANG_BATCH_CONCURRENCY, len(chunks))
+        fetched = {}
+        # Copy the request's context so calls from the pool are still timed
+        contexts = [contextvars.copy_context() for _ in chunks]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for profiles in executor.map(
+                lambda context, chunk: context.run(self._fetch_chunk, chunk),
+                contexts,
+                chunks,
+            ):
+                for profile in profiles:
+                    fetched[profile["name"].lower()] = profile["id"]
+
+        return fetched
+
+    def _fetch_chunk(self, usernames):
+        # Mojang rejects the whole chunk if any name is syntactically invalid
+        usernames = [name for name in usernames if VALID_USERNAME.match(name)]
+        if not usernames:
+            return []
+        res = self._request("post", "/profiles/minecraft", json=usernames)
+        if res.status_code != 200:
+            raise MojangUnavailable(f"Mojang API returned {res.status_code}")
+        return res.json()
+
+    def fetch(self, username):
+        """Fetches the UUID for username from the Mojang API"""
+        res = self._request("get", f"/users/profiles/minecraft/{username}")
+        if res.status_code in (204, 400, 404):
+            raise ValueError("Users must have a valid MC username")
+        if res.status_code != 200:
+            raise MojangUnavailable(f"Mojang API returned {res.status_code}")
+        return res.json()["id"]
+
+    def _request(self, method, path, **kwargs):
+        """Calls the Mojang API through the circuit breaker"""
+        if not self.breaker.allow():
+            raise MojangUnavailable("Mojang API circuit breaker is open")
+        try:
+            with metrics.timer("mojang"):
+                res = self.session.request(
+                    method, f"{self.api_url}{path}", timeout=self.timeout, **kwargs
+                )
+        except requests.RequestException as exc:
+            self.breaker.record_failure()
+            raise MojangUnavailable(f"Mojang API request failed: {exc}") from exc
+        if res.status_code == 429 or res.status_code >= 500:
+            self.breaker.record_failure()
+            raise MojangUnavailable(f"Mojang API returned {res.status_code}")
+        self.breaker.record_success()
+
+        return res
+
+    def _load_profile(self, key):
+        profile_model = apps.get_model("core", "MinecraftProfile")
+        return profile_model.objects.filter(username=key).first()
+
+    def _store_profile(self, key, mc_uuid):
+        profile_model = apps.get_model("core", "MinecraftProfile")
+        profile_model.objects.update_or_create(
+            username=key,
+            defaults={"mc_uuid": mc_uuid, "last_resolved": timezone.now()},
+        )
+
+    def _store_profiles(self, fetched, profiles):
+        profile_model = apps.get_model("core", "MinecraftProfile")
+        now = timezone.now()
+        updated = []
+        created = []
+        for key, mc_uuid in fetched.items():
+            profile = profiles.get(key)
+            if profile:
+                profile.mc_uuid = mc_uuid
+                profile.last_resolved = now
+                updated.append(profile)
+            else:
+                created.append(
+                    profile_model(username=key, mc_uuid=mc_uuid, last_resolved=now)
+                )
+        if updated:
+            profile_model.objects.bulk_update(updated, ["mc_uuid", "last_resolved"])
+        if created:
+            profile_model.objects.bulk_create(created, ignore_conflicts=True)
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Returns the process wide UUIDResolver configured from settings"""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = UUIDResolver()
+    return _resolver
+
+
+@receiver(setting_changed)
+def reset_resolver(setting, **kwargs):
+    """Drops the shared resolver when any Mojang setting is overridden"""
+    global _resolver
+    if setting.startswith("MOJANG_"):
+        _resolver = None
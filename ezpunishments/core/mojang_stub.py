@@ -0,0 +1,131 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ezpunishments.core.mojang import VALID_USERNAME
+
+
+class MojangStubServer:
+    """Local stand-in for the Mojang profile API
+
+    Known profiles are served from a dict. With generate=True any valid
+    username resolves to a UUID derived from its name, which is handy for
+    seeding large amounts of data. status_code and delay can be changed on
+    a running server to simulate an unhealthy API.
+    """
+
+    batch_limit = 10
+
+    def __init__(self, profiles=None, generate=False, status_code=None, delay=0):
+        self.profiles = {
+            name.lower(): mc_uuid for name, mc_uuid in (profiles or {}).items()
+        }
+        self.generate = generate
+        self.status_code = status_code
+        self.delay = delay
+        self.requests = []
+        self.batches = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def lookup(self, username):
+        """Returns the UUID served for username, or None if it doesn't exist"""
+        if not VALID_USERNAME.match(username):
+            return None
+        mc_uuid = self.profiles.get(username.lower())
+        if mc_uuid is None and self.generate:
+            mc_uuid = hashlib.md5(username.lower().encode()).hexdigest()
+        return mc_uuid
+
+    def reset(self, status_code=None):
+        """Forgets the requests served so far and makes the API healthy again"""
+        self.status_code = status_code
+        self.delay = 0
+        self.requests.clear()
+        self.batches.clear()
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(("GET", self.path))
+                if self._simulate_failure():
+                    return
+                match = re.match(r"^/users/profiles/minecraft/([^/]*)$", self.path)
+                if not match:
+                    return self._send(404, {"error": "Not Found"})
+                name = match.group(1)
+                mc_uuid = stub.lookup(name)
+                if mc_uuid is None:
+                    return self._send(404, {"errorMessage": "Profile not found"})
+                self._send(200, {"id": mc_uuid, "name": name})
+
+            def do_POST(self):
+                stub.requests.append(("POST", self.path))
+                length = int(self.headers.get("Content-Length") or 0)
+                names = json.loads(self.rfile.read(length) or b"[]")
+                stub.batches.append(names)
+                if self._simulate_failure():
+                    return
+                if self.path != "/profiles/minecraft":
+                    return self._send(404, {"error": "Not Found"})
+                if len(names) > stub.batch_limit:
+                    return self._send(400, {"errorMessage": "Too many names"})
+                profiles = []
+                for name in names:
+                    mc_uuid = stub.lookup(name)
+                    if mc_uuid is not None:
+                        profiles.append({"id": mc_uuid, "name": name})
+                self._send(200, profiles)
+
+            def _simulate_failure(self):
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.status_code:
+                    self._send(stub.status_code, {"error": "Simulated failure"})
+                    return True
+                return False
+
+            def _send(self, status_code, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
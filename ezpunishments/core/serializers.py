@@ -0,0 +1,31 @@
+from django.db import models
+from rest_framework import serializers
+
+from ezpunishments.core import metrics
+from ezpunishments.core.mojang import normalize_uuid
+
+
+class MCUUIDField(serializers.UUIDField):
+    """UUID field that accepts dashed or undashed MC UUIDs and returns undashed"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("format", "hex")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        # Unsaved instances still hold whatever string they were given
+        return normalize_uuid(value)
+
+
+class MCUUIDModelSerializer(serializers.ModelSerializer):
+    """Model serializer that renders every UUIDField as an undashed MC UUID"""
+
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.UUIDField: MCUUIDField,
+    }
+
+    @property
+    def data(self):
+        with metrics.timer("serialize"):
+            return super().data
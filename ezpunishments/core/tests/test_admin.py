@@ -2,9 +2,12 @@ from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from ezpunishments.core.tests.utils import MojangStubMixin
 
-class AdminSiteTests(TestCase):
+
+class AdminSiteTests(MojangStubMixin, TestCase):
     def setUp(self):
+        super().setUp()
         self.client = Client()
         self.admin_user = get_user_model().objects.create_superuser(
             username="smiileyface", password="Testpass123"
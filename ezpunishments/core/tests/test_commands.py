@@ -1,9 +1,12 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from ezpunishments.core.models import Punishment
+
 
 class CommandTests(TestCase):
     def test_wait_for_db_ready(self):
@@ -20,3 +23,11 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command("wait_for_db")
             self.assertEqual(gi.call_count, 6)
+
+    def test_benchmark_indexes(self):
+        """Test the index benchmark reports timings and leaves no rows behind"""
+        out = StringIO()
+        call_command("benchmark_indexes", rows=50, repeat=1, stdout=out)
+
+        self.assertIn("ban check", out.getvalue())
+        self.assertFalse(Punishment.objects.exists())
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ezpunishments.core import metrics
+from ezpunishments.core.tests.utils import MojangStubMixin
+
+
+METRICS_URL = reverse("metrics")
+PUNISHMENTS_URL = reverse("punishment:punishment-list")
+
+
+class MetricTests(TestCase):
+    def test_histogram_render(self):
+        """Test that histograms render cumulative buckets, sum and count"""
+        histogram = metrics.Histogram("test_seconds", "Test", ("view",), (0.1, 1))
+        histogram.observe(0.05, ("a",))
+        histogram.observe(0.5, ("a",))
+        histogram.observe(5, ("a",))
+
+        lines = histogram.render()
+
+        self.assertIn('test_seconds_bucket{view="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{view="a",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{view="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{view="a"} 5.55', lines)
+        self.assertIn('test_seconds_count{view="a"} 3', lines)
+
+    def test_labels_escaped(self):
+        """Test that label values can't break out of their quotes"""
+        counter = metrics.Counter("test_total", "Test", ("view",))
+        counter.inc(('a"b\\c',))
+
+        self.assertIn('test_total{view="a\\"b\\\\c"} 1', counter.render())
+
+
+class RequestMetricsTests(MojangStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.REGISTRY.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing(self):
+        """Test that responses break down where their time went"""
+        payload = {
+            "mc_username": "SamieMarie",
+            "reason": "Being a noob",
+            "punished_by": "smiileyface",
+            "expires": timezone.now() + timedelta(days=7),
+        }
+
+        res = self.client.post(PUNISHMENTS_URL, payload)
+
+        timing = res["Server-Timing"]
+        self.assertTrue(timing.startswith("total;dur="))
+        self.assertIn("db;dur=", timing)
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("mojang;dur=", timing)
+        self.assertIn('desc="1 calls"', timing)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint(self):
+        """Test that requests are aggregated per view in Prometheus format"""
+        self.client.get(PUNISHMENTS_URL)
+        self.client.get(PUNISHMENTS_URL)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(res["Content-Type"], metrics.CONTENT_TYPE)
+        body = res.content.decode()
+        labels = 'view="punishment:punishment-list",method="GET"'
+        self.assertIn(f'ezpunishments_requests_total{{{labels},status="200"}} 2', body)
+        self.assertIn(f"ezpunishments_request_db_queries_count{{{labels}}} 2", body)
+        self.assertIn(
+            f'ezpunishments_request_mojang_calls_bucket{{{labels},le="0.0"}} 2', body
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        """Test that a configured token is required to scrape metrics"""
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_without_token(self):
+        """Test that metrics aren't exposed unless a token is configured"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_unknown_method_label(self):
+        """Test that non-standard methods share one label value"""
+        self.client.generic("PURGE", PUNISHMENTS_URL)
+
+        body = metrics.REGISTRY.render()
+        self.assertIn('view="punishment:punishment-list",method="other"', body)
+        self.assertNotIn("PURGE", body)
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test that the Server-Timing header can be turned off"""
+        res = self.client.get(PUNISHMENTS_URL)
+
+        self.assertFalse(res.has_header("Server-Timing"))
@@ -3,12 +3,13 @@ from django.contrib.auth import get_user_model
 from django.utils.timezone import make_aware
 
 from ezpunishments.core import models
+from ezpunishments.core.tests.utils import MojangStubMixin
 
 from datetime import datetime
 from datetime import timedelta
 
 
-class ModelTests(TestCase):
+class ModelTests(MojangStubMixin, TestCase):
     def test_create_user_with_username_successful(self):
         """Test creating a new user with username is successful"""
         username = "smiileyface"
@@ -88,3 +89,62 @@ class ModelTests(TestCase):
                 punished_by=punished_by,
                 expires=expires,
             )
+
+    def test_create_many_punishments_successful(self):
+        """Test creating many punishments at once is successful"""
+        expires = datetime.now() + timedelta(days=1)
+        punishments = models.Punishment.objects.create_many(
+            [
+                {
+                    "mc_username": mc_username,
+                    "reason": "Hacking like a noob",
+                    "punished_by": "smiileyface",
+                    "expires": expires,
+                }
+                for mc_username in ("SamieMarie", "smiileyface")
+            ]
+        )
+
+        self.assertEqual(models.Punishment.objects.count(), 2)
+        self.assertEqual(punishments[0].mc_uuid, "c5cb9e1c4cbe4563bc55754d59b55a1e")
+        self.assertEqual(
+            punishments[1].punished_by_uuid, "c6edbd5a24aa440d918a1e299b22e5f9"
+        )
+        self.assertEqual(punishments[0].expires, make_aware(expires))
+
+    def test_create_many_punishments_known_uuids(self):
+        """Test that UUIDs passed to create_many are used without a lookup"""
+        mc_uuids = {
+            "SamieMarie": "00000000000000000000000000000001",
+            "smiileyface": "00000000000000000000000000000002",
+        }
+        punishments = models.Punishment.objects.create_many(
+            [
+                {
+                    "mc_username": "SamieMarie",
+                    "reason": "Hacking like a noob",
+                    "punished_by": "smiileyface",
+                    "expires": datetime.now() + timedelta(days=1),
+                }
+            ],
+            mc_uuids=mc_uuids,
+        )
+
+        self.assertEqual(punishments[0].mc_uuid, mc_uuids["SamieMarie"])
+        self.assertEqual(punishments[0].punished_by_uuid, mc_uuids["smiileyface"])
+
+    def test_create_many_punishments_invalid_username(self):
+        """Test creating many punishments with an invalid MC username fails"""
+        with self.assertRaises(ValueError):
+            models.Punishment.objects.create_many(
+                [
+                    {
+                        "mc_username": ">invalid<",
+                        "reason": "Hacking like a noob",
+                        "punished_by": "smiileyface",
+                        "expires": datetime.now() + timedelta(days=1),
+                    }
+                ]
+            )
+
+        self.assertFalse(models.Punishment.objects.exists())
@@ -0,0 +1,252 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ezpunishments.core import models
+from ezpunishments.core.mojang import (
+    CircuitBreaker,
+    LRUCache,
+    MojangUnavailable,
+    UUIDResolver,
+)
+from ezpunishments.core.tests.utils import MojangStubMixin
+
+
+MC_UUID = "c6edbd5a24aa440d918a1e299b22e5f9"
+
+
+def stale_profile(mc_uuid=MC_UUID):
+    """Create and return a stored profile that is due for a refresh"""
+    return models.MinecraftProfile.objects.create(
+        username="smiileyface",
+        mc_uuid=mc_uuid,
+        last_resolved=timezone.now() - timedelta(days=2),
+    )
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest entry is evicted once the cache is full"""
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    @patch("ezpunishments.core.mojang.time.monotonic")
+    def test_entries_expire(self, monotonic):
+        """Test that entries are dropped once their TTL has passed"""
+        monotonic.return_value = 100
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+
+        monotonic.return_value = 161
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class CircuitBreakerTests(TestCase):
+    @patch("ezpunishments.core.mojang.time.monotonic")
+    def test_opens_after_threshold(self, monotonic):
+        """Test that the breaker rejects calls after repeated failures"""
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+
+        self.assertTrue(breaker.is_open)
+        self.assertFalse(breaker.allow())
+
+    @patch("ezpunishments.core.mojang.time.monotonic")
+    def test_half_open_after_reset_timeout(self, monotonic):
+        """Test that a single trial call is allowed once the timeout passes"""
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+
+        monotonic.return_value = 131
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+
+
+class UUIDResolverTests(MojangStubMixin, TestCase):
+    mojang_profiles = {"smiileyface": MC_UUID}
+    mojang_generate = False
+
+    def setUp(self):
+        super().setUp()
+        self.resolver = UUIDResolver(
+            api_url=self.stub.url,
+            timeout=(0.5, 0.2),
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30),
+        )
+
+    def test_resolve_fetches_from_mojang(self):
+        """Test that an unknown username is fetched and stored"""
+        mc_uuid = self.resolver.resolve("smiileyface")
+
+        self.assertEqual(mc_uuid, MC_UUID)
+        self.assertEqual(
+            self.stub.requests, [("GET", "/users/profiles/minecraft/smiileyface")]
+        )
+        profile = models.MinecraftProfile.objects.get(username="smiileyface")
+        self.assertEqual(profile.mc_uuid.hex, MC_UUID)
+
+    def test_resolve_uses_memory_cache(self):
+        """Test that repeated lookups are case insensitive and cached"""
+        self.resolver.resolve("smiileyface")
+        mc_uuid = self.resolver.resolve("SmiileyFace")
+
+        self.assertEqual(mc_uuid, MC_UUID)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_resolve_uses_profile_table(self):
+        """Test that a fresh stored profile is used without calling Mojang"""
+        models.MinecraftProfile.objects.create(
+            username="smiileyface", mc_uuid=MC_UUID, last_resolved=timezone.now()
+        )
+
+        mc_uuid = self.resolver.resolve("smiileyface")
+
+        self.assertEqual(mc_uuid, MC_UUID)
+        self.assertEqual(self.stub.requests, [])
+
+    def test_resolve_refreshes_stale_profile(self):
+        """Test that a stale stored profile is refreshed from Mojang"""
+        stale_profile(mc_uuid="0" * 32)
+
+        mc_uuid = self.resolver.resolve("smiileyface")
+
+        self.assertEqual(mc_uuid, MC_UUID)
+        profile = models.MinecraftProfile.objects.get(username="smiileyface")
+        self.assertEqual(profile.mc_uuid.hex, MC_UUID)
+
+    def test_resolve_invalid_username(self):
+        """Test that an unknown username raises and isn't cached"""
+        with self.assertRaises(ValueError):
+            self.resolver.resolve("nobody")
+
+        self.assertFalse(models.MinecraftProfile.objects.exists())
+        self.assertEqual(len(self.resolver.cache), 0)
+
+    def test_resolve_server_error(self):
+        """Test that 5xx responses are failures and not parsed as profiles"""
+        self.stub.status_code = 503
+
+        with self.assertRaises(MojangUnavailable):
+            self.resolver.resolve("smiileyface")
+
+    def test_resolve_unexpected_status(self):
+        """Test that other error statuses aren't parsed as profiles"""
+        for status_code in (401, 403, 405):
+            self.stub.status_code = status_code
+
+            with self.assertRaises(MojangUnavailable):
+                self.resolver.resolve("smiileyface")
+
+    def test_resolve_rate_limited(self):
+        """Test that a 429 response counts as Mojang being unavailable"""
+        self.stub.status_code = 429
+
+        with self.assertRaises(MojangUnavailable):
+            self.resolver.resolve("smiileyface")
+
+    def test_resolve_timeout(self):
+        """Test that a hung Mojang API times out instead of blocking"""
+        self.stub.delay = 0.5
+
+        with self.assertRaises(MojangUnavailable):
+            self.resolver.resolve("smiileyface")
+
+    def test_breaker_fails_fast(self):
+        """Test that Mojang isn't called while the breaker is open"""
+        self.stub.status_code = 500
+        for _ in range(2):
+            with self.assertRaises(MojangUnavailable):
+                self.resolver.resolve("smiileyface")
+
+        with self.assertRaises(MojangUnavailable):
+            self.resolver.resolve("smiileyface")
+
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_resolve_serves_stale_profile_on_failure(self):
+        """Test that the last known UUID is served when a refresh fails"""
+        stale_profile()
+        self.stub.status_code = 500
+
+        mc_uuid = self.resolver.resolve("smiileyface")
+
+        self.assertEqual(mc_uuid, MC_UUID)
+        self.assertEqual(len(self.stub.requests), 1)
+
+
+class UUIDResolverBatchTests(MojangStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.resolver = UUIDResolver(api_url=self.stub.url)
+
+    def test_resolve_many_chunks_requests(self):
+        """Test that names are resolved in chunks of the maximum batch size"""
+        usernames = [f"player{i}" for i in range(25)]
+
+        resolved = self.resolver.resolve_many(usernames)
+
+        self.assertEqual(len(resolved), 25)
+        self.assertEqual(resolved["player3"], self.stub.lookup("player3"))
+        self.assertEqual(sorted(len(batch) for batch in self.stub.batches), [5, 10, 10])
+        self.assertEqual(models.MinecraftProfile.objects.count(), 25)
+
+    def test_resolve_many_dedupes_names(self):
+        """Test that repeated names are only requested once"""
+        resolved = self.resolver.resolve_many(["Notch", "notch", "Notch"])
+
+        self.assertEqual(self.stub.batches, [["Notch"]])
+        self.assertEqual(set(resolved), {"Notch", "notch"})
+
+    def test_resolve_many_uses_cache(self):
+        """Test that cached and stored names aren't requested again"""
+        self.resolver.resolve_many(["Notch"])
+        models.MinecraftProfile.objects.create(
+            username="jeb_", mc_uuid=MC_UUID, last_resolved=timezone.now()
+        )
+
+        resolved = self.resolver.resolve_many(["Notch", "jeb_", "Dinnerbone"])
+
+        self.assertEqual(self.stub.batches, [["Notch"], ["Dinnerbone"]])
+        self.assertEqual(resolved["jeb_"], MC_UUID)
+
+    def test_resolve_many_skips_unknown_names(self):
+        """Test that names that don't exist are left out of the result"""
+        resolved = self.resolver.resolve_many(["Notch", ">invalid<"])
+
+        self.assertEqual(list(resolved), ["Notch"])
+
+    def test_resolve_many_serves_stale_profiles(self):
+        """Test that stored UUIDs are served when the bulk request fails"""
+        stale_profile()
+        self.stub.status_code = 500
+
+        resolved = self.resolver.resolve_many(["smiileyface"])
+
+        self.assertEqual(resolved, {"smiileyface": MC_UUID})
+
+    def test_resolve_many_unavailable(self):
+        """Test that unknown names raise when Mojang is unavailable"""
+        stale_profile()
+        self.stub.status_code = 500
+
+        with self.assertRaises(MojangUnavailable):
+            self.resolver.resolve_many(["smiileyface", "Notch"])
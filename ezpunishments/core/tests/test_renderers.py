@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+
+from ezpunishments.core.renderers import FastJSONRenderer
+
+
+SAMPLE_DATA = {
+    "id": 1,
+    "reason": 'Hacking like a noob \u00e9 \u2028\u2029 \x1f"\\',
+    "proof": None,
+    "is_active": True,
+    "expires": datetime(2020, 9, 24, 0, 30, 5, 123456, tzinfo=timezone.utc),
+    "mc_uuid": uuid.UUID("c6edbd5a24aa440d918a1e299b22e5f9"),
+    "amount": Decimal("1.50"),
+    "detail": _("Not found."),
+    "results": [{"nested": [1, 2, 3]}],
+}
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_json_renderer(self):
+        """Test that output is byte for byte what JSONRenderer produces"""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE_DATA), JSONRenderer().render(SAMPLE_DATA)
+        )
+
+    def test_indented_output_matches_json_renderer(self):
+        """Test that indented output is left to JSONRenderer"""
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE_DATA, media_type),
+            JSONRenderer().render(SAMPLE_DATA, media_type),
+        )
+
+    def test_unsupported_types_fall_back(self):
+        """Test that data orjson rejects is rendered by the stdlib encoder"""
+        data = {1: "integer key", "big": 2**70}
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    @patch("ezpunishments.core.renderers.orjson", None)
+    def test_without_orjson(self):
+        """Test that the renderer works when orjson isn't installed"""
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE_DATA), JSONRenderer().render(SAMPLE_DATA)
+        )
@@ -0,0 +1,53 @@
+from django.test import override_settings
+
+from ezpunishments.core.mojang_stub import MojangStubServer
+
+
+SAMIEMARIE_UUID = "c5cb9e1c4cbe4563bc55754d59b55a1e"
+SMIILEYFACE_UUID = "c6edbd5a24aa440d918a1e299b22e5f9"
+NOTCH_UUID = "069a79f444e94726a5befca90e38aaf5"
+
+PROFILES = {
+    "SamieMarie": SAMIEMARIE_UUID,
+    "smiileyface": SMIILEYFACE_UUID,
+    "Notch": NOTCH_UUID,
+}
+
+
+class MojangStubMixin:
+    """Resolves usernames against a local MojangStubServer instead of Mojang
+
+    One stub serves the whole class. Before each test it's reset and
+    MOJANG_API_URL pointed at it, which also gives the shared resolver a
+    fresh cache and circuit breaker. Subclasses overriding setUp() must
+    call super().setUp().
+
+    The sample players keep their real UUIDs and, with mojang_generate, any
+    other valid username gets one derived from its name.
+    """
+
+    mojang_profiles = PROFILES
+    mojang_generate = True
+    mojang_status_code = None
+    mojang_settings = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = MojangStubServer(
+            cls.mojang_profiles, generate=cls.mojang_generate
+        ).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.stub.reset(self.mojang_status_code)
+        overrides = override_settings(
+            MOJANG_API_URL=self.stub.url, **self.mojang_settings
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from ezpunishments.core import metrics
+
+
+@require_GET
+def export_metrics(request):
+    """Return the request metrics in the Prometheus text format
+
+    Scrapers must send Authorization: Bearer <METRICS_TOKEN>. Without a
+    METRICS_TOKEN configured the metrics aren't exposed at all.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        return HttpResponse(status=403)
+    authorization = request.headers.get("Authorization", "")
+    if not constant_time_compare(authorization, f"Bearer {token}"):
+        return HttpResponse(status=401)
+
+    return HttpResponse(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class PunishmentConfig(AppConfig):
-    name = "punishment"
+    name = "ezpunishments.punishment"
+
+    def ready(self):
+        from . import signals  # noqa: F401
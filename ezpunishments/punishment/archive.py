@@ -0,0 +1,129 @@
+import heapq
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ezpunishments.core.models import (
+    Punishment,
+    PunishmentArchive,
+    PunishmentTombstone,
+    UUIDResolutionJob,
+)
+from . import bans, events, stats
+
+
+ARCHIVED_FIELDS = tuple(field.attname for field in Punishment._meta.concrete_fields)
+
+
+def cold_punishments(cutoff):
+    """Returns the live punishments that are old enough to be archived"""
+    return Punishment.objects.filter(
+        Q(is_active=False, last_updated__lt=cutoff) | Q(expires__lt=cutoff)
+    )
+
+
+def archive_batch(cutoff, batch_size):
+    """Moves one batch of cold punishments to the archive, returning how many
+
+    Rows locked by another transaction are skipped for now. The live rows
+    are deleted without per-row signals; caches, stats and event streams
+    are updated once for the whole batch instead. Tombstones are written
+    last so they're stamped just before the commit, and the changes feed
+    doesn't skip past them while the batch is still running.
+    """
+    with transaction.atomic():
+        punishments = list(
+            cold_punishments(cutoff)
+            .order_by("id")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not punishments:
+            return 0
+        ids = [punishment.id for punishment in punishments]
+        archived_at = timezone.now()
+        PunishmentArchive.objects.bulk_create(
+            [
+                PunishmentArchive(
+                    archived_at=archived_at,
+                    **{name: getattr(punishment, name) for name in ARCHIVED_FIELDS},
+                )
+                for punishment in punishments
+            ]
+        )
+        # The raw delete doesn't cascade, so drop pending lookups first
+        UUIDResolutionJob.objects.filter(punishment_id__in=ids).delete()
+        live = Punishment.objects.filter(id__in=ids)
+        live._raw_delete(live.db)
+        bans.invalidate([punishment.mc_uuid for punishment in punishments])
+        stats.record_deleted(punishments)
+        events.publish("deleted", punishments)
+        PunishmentTombstone.objects.bulk_create(
+            [
+                PunishmentTombstone(
+                    punishment_id=punishment.id, mc_uuid=punishment.mc_uuid
+                )
+                for punishment in punishments
+            ]
+        )
+
+    return len(punishments)
+
+
+class UnionQuerySet:
+    """Ordered union of querysets with the same columns, that can still be filtered
+
+    Django can't filter a union(), which cursor pagination relies on, so
+    filter() and order_by() are applied to every queryset and slices are
+    merged in Python. Each queryset only has to read as far as the end of
+    the slice through its own indexes. Slicing needs values() rows and an
+    ordering whose fields all go the same direction.
+    """
+
+    def __init__(self, *querysets, ordering=()):
+        self.querysets = querysets
+        self.ordering = ordering
+        self.model = querysets[0].model
+
+    def _apply(self, method, *args, **kwargs):
+        return [
+            getattr(queryset, method)(*args, **kwargs) for queryset in self.querysets
+        ]
+
+    def filter(self, *args, **kwargs):
+        return UnionQuerySet(
+            *self._apply("filter", *args, **kwargs), ordering=self.ordering
+        )
+
+    def order_by(self, *ordering):
+        return UnionQuerySet(*self._apply("order_by", *ordering), ordering=ordering)
+
+    def values(self, *fields):
+        return UnionQuerySet(*self._apply("values", *fields), ordering=self.ordering)
+
+    def get(self, *args, **kwargs):
+        """Returns the first match from the querysets in order"""
+        for queryset in self.querysets:
+            try:
+                return queryset.get(*args, **kwargs)
+            except queryset.model.DoesNotExist:
+                pass
+        raise self.model.DoesNotExist
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.stop is None:
+            raise TypeError("UnionQuerySet only supports bounded slices")
+        descending = {field.startswith("-") for field in self.ordering}
+        if len(descending) != 1:
+            raise ValueError(
+                "UnionQuerySet needs every ordering field in one direction"
+            )
+        names = [field.lstrip("-") for field in self.ordering]
+        stop = key.stop
+        merged = heapq.merge(
+            *(list(queryset[:stop]) for queryset in self.querysets),
+            key=lambda row: tuple(row[name] for name in names),
+            reverse=descending.pop(),
+        )
+        return list(islice(merged, key.start, key.stop))
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ezpunishments.core.models import Punishment
+from ezpunishments.core.mojang import normalize_uuid
+
+
+ACTIVE_PUNISHMENT_FIELDS = (
+    "id",
+    "mc_uuid",
+    "mc_username",
+    "reason",
+    "punished_by",
+    "expires",
+)
+
+# Cached for players without an active punishment so misses are cached too
+NOT_PUNISHED = False
+
+
+def cache_key(mc_uuid):
+    return f"punishment:active:{normalize_uuid(mc_uuid)}"
+
+
+def cache_timeout(punishment):
+    """Returns how long a check result may be cached for"""
+    timeout = settings.PUNISHMENT_CHECK_CACHE_TTL
+    if punishment is not NOT_PUNISHED:
+        remaining = (punishment["expires"] - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(remaining) + 1))
+    return timeout
+
+
+def get_active_punishment(mc_uuid):
+    """Returns the currently effective punishment for mc_uuid, or None"""
+    return get_active_punishments([mc_uuid]).get(mc_uuid)
+
+
+def get_active_punishments(mc_uuids):
+    """Returns the currently effective punishment for each punished mc_uuid
+
+    mc_uuids must already be normalized with normalize_uuid.
+
+    Cached results are used where possible and every miss is answered by a
+    single query, after which the misses are cached as well.
+    """
+    keys = {cache_key(mc_uuid): mc_uuid for mc_uuid in mc_uuids}
+    cached = cache.get_many(list(keys))
+    punishments = {keys[key]: punishment for key, punishment in cached.items()}
+
+    misses = [mc_uuid for key, mc_uuid in keys.items() if key not in cached]
+    if misses:
+        queried = dict.fromkeys(misses, NOT_PUNISHED)
+        rows = (
+            Punishment.objects.filter(
+                mc_uuid__in=misses, is_active=True, expires__gt=timezone.now()
+            )
+            .order_by("mc_uuid", "expires")
+            .values(*ACTIVE_PUNISHMENT_FIELDS)
+        )
+        for row in rows:
+            # Rows come back by expiry, so the longest punishment wins
+            row["mc_uuid"] = normalize_uuid(row["mc_uuid"])
+            queried[row["mc_uuid"]] = row
+        cache.set_many(
+            {
+                cache_key(mc_uuid): NOT_PUNISHED
+                for mc_uuid, punishment in queried.items()
+                if punishment is NOT_PUNISHED
+            },
+            cache_timeout(NOT_PUNISHED),
+        )
+        for mc_uuid, punishment in queried.items():
+            if punishment is not NOT_PUNISHED:
+                cache.set(cache_key(mc_uuid), punishment, cache_timeout(punishment))
+        punishments.update(queried)
+
+    now = timezone.now()
+    return {
+        mc_uuid: punishment
+        for mc_uuid, punishment in punishments.items()
+        if punishment is not NOT_PUNISHED and punishment["expires"] > now
+    }
+
+
+def invalidate(mc_uuids):
+    """Drops cached check results for mc_uuids
+
+    Keys are deleted straight away and again once the transaction commits,
+    so a concurrent check can't re-cache the row as it was before the write.
+    """
+    # Punishments still waiting on UUID resolution have nothing cached yet
+    keys = [cache_key(mc_uuid) for mc_uuid in set(mc_uuids) if mc_uuid]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,64 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from ezpunishments.core.models import Punishment, PunishmentTombstone
+
+
+def make_etag(request, *parts):
+    """Returns a strong ETag for parts and the URL and format being rendered"""
+    key = "|".join(
+        str(part)
+        for part in (request.get_full_path(), request.accepted_renderer.format, *parts)
+    )
+    return quote_etag(hashlib.sha256(key.encode()).hexdigest())
+
+
+def list_validators(request, queryset):
+    """Returns an ETag covering every punishment in queryset
+
+    Any save makes its row the newest by last_updated and any delete,
+    including archiving, adds a tombstone, so reading the newest of each
+    off their indexes tells whether a cached copy is current. last_updated
+    is set when a row is saved rather than committed though, so rows that
+    commit after a newer one are caught by counting the matching rows. No
+    last modified time is given since it can't tell apart changes within a
+    second.
+    """
+    newest_row = Punishment.objects.order_by("-last_updated", "-id").values_list(
+        "last_updated", "id"
+    )[:1]
+    newest_tombstone = PunishmentTombstone.objects.order_by("-id").values_list(
+        "deleted_at", "id"
+    )[:1]
+    states = sorted(newest_row.union(newest_tombstone, all=True))
+    count = sum(
+        part.order_by().count() for part in getattr(queryset, "querysets", (queryset,))
+    )
+
+    return make_etag(request, count, *states)
+
+
+def instance_validators(request, instance):
+    """Returns an ETag and last modified time for a single saved object"""
+    return make_etag(request, instance.pk, instance.last_updated), instance.last_updated
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """Returns a 304 response if the client's copy is still current, else None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
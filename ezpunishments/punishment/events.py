@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .serializers import PunishmentSerializer
+
+
+def format_event(event_type, data):
+    """Returns a Server-Sent Events frame for data"""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"event: {event_type}\ndata: {payload}\n\n".encode()
+
+
+class Subscription:
+    """Queue of event frames for one connected client
+
+    Subscriptions belong to the event loop they were created on. A client
+    that falls more than maxsize events behind is closed, so it reconnects
+    and catches up from the changes feed instead of holding memory.
+    """
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def put(self, frame):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.broker.unsubscribe(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self):
+        """Returns the next frame, or None once the subscription is closed"""
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    """Fans events out to every subscriber in this process
+
+    publish() may be called from any thread, frames are handed to each
+    subscriber's event loop with call_soon_threadsafe. Clients connected to
+    other processes need a shared broker with the same interface.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, maxsize=None):
+        """Returns a Subscription, must be called from a running event loop"""
+        subscription = Subscription(
+            self, maxsize or settings.PUNISHMENT_EVENTS_QUEUE_SIZE
+        )
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, frame):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, frame)
+            except RuntimeError:
+                # The subscriber's event loop has already been closed
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Returns the process wide broker named by PUNISHMENT_EVENTS_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUNISHMENT_EVENTS_BROKER)()
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == "PUNISHMENT_EVENTS_BROKER":
+        _broker = None
+
+
+def publish(event_type, punishments):
+    """Sends an event for each punishment once the transaction commits"""
+    frames = [
+        format_event(event_type, PunishmentSerializer(punishment).data)
+        for punishment in punishments
+    ]
+
+    def send():
+        broker = get_broker()
+        for frame in frames:
+            broker.publish(frame)
+
+    transaction.on_commit(send)
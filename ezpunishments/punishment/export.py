@@ -0,0 +1,61 @@
+import csv
+import json
+
+from django.conf import settings
+from django.utils import timezone
+
+from .encoders import get_row_encoder
+from .serializers import PunishmentSerializer
+
+
+EXPORT_FIELDS = get_row_encoder(PunishmentSerializer).names
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class Echo:
+    """File-like object that hands back whatever is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=None, fields=None):
+    """Yields each punishment as a dict of JSON friendly values
+
+    Rows are read straight from values() through a server side cursor so
+    memory use doesn't grow with the size of the table.
+    """
+    encoder = get_row_encoder(PunishmentSerializer, fields)
+    rows = queryset.order_by("id").values(*encoder.sources)
+    chunk_size = chunk_size or settings.PUNISHMENT_EXPORT_CHUNK_SIZE
+    tz = timezone.get_current_timezone()
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield encoder.encode(row, tz)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows, field_names=EXPORT_FIELDS):
+    writer = csv.DictWriter(Echo(), fieldnames=field_names)
+    yield writer.writerow(dict(zip(field_names, field_names)))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(queryset, export_format, chunk_size=None, fields=None):
+    """Yields the punishments in queryset encoded as NDJSON or CSV lines
+
+    fields limits the output to a frozenset of field names, all by default.
+    """
+    rows = export_rows(queryset, chunk_size, fields)
+    if export_format == "csv":
+        field_names = get_row_encoder(PunishmentSerializer, fields).names
+        return csv_lines(rows, field_names)
+    return ndjson_lines(rows)
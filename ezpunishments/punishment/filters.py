@@ -0,0 +1,115 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from ezpunishments.core.models import PunishmentArchive
+from ezpunishments.core.mojang import normalize_uuid
+from .archive import UnionQuerySet
+
+
+def get_values(request, param):
+    """Returns every value given for param, splitting on commas"""
+    return [
+        value.strip()
+        for values in request.query_params.getlist(param)
+        for value in values.split(",")
+        if value.strip()
+    ]
+
+
+class PunishmentFilterBackend(BaseFilterBackend):
+    """Filters and orders punishments from query parameters
+
+    Value filters accept repeated parameters and comma separated values,
+    and every filter and ordering maps onto one of the Punishment indexes.
+    Views listing actions in history_actions also read archived punishments
+    when history=true is given.
+    """
+
+    value_filters = {
+        "mc_username": "mc_username__in",
+        "mc_uuid": "mc_uuid__in",
+        "punished_by": "punished_by__in",
+        "punished_by_uuid": "punished_by_uuid__in",
+    }
+    uuid_filters = ("mc_uuid", "punished_by_uuid")
+    range_filters = {
+        "expires_after": "expires__gt",
+        "expires_before": "expires__lte",
+        "punished_after": "date_punished__gt",
+        "punished_before": "date_punished__lte",
+    }
+    history_param = "history"
+    ordering_param = "ordering"
+    ordering_fields = ("date_punished", "expires")
+    default_ordering = ("-date_punished", "-id")
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        for param, lookup in self.value_filters.items():
+            values = get_values(request, param)
+            if values and param in self.uuid_filters:
+                values = self.parse_uuids(param, values)
+            if values:
+                filters[lookup] = values
+
+        for param, lookup in self.range_filters.items():
+            value = request.query_params.get(param)
+            if value:
+                filters[lookup] = self.parse_datetime(param, value)
+
+        is_active = request.query_params.get("is_active")
+        if is_active:
+            filters["is_active"] = self.parse_bool("is_active", is_active)
+
+        queryset = queryset.filter(**filters)
+        if self.include_history(request, view):
+            queryset = UnionQuerySet(
+                queryset, PunishmentArchive.objects.filter(**filters)
+            )
+
+        return queryset.order_by(*self.get_ordering(request, queryset, view))
+
+    def include_history(self, request, view):
+        history = request.query_params.get(self.history_param)
+        if not history or view.action not in getattr(view, "history_actions", ()):
+            return False
+        return self.parse_bool(self.history_param, history)
+
+    def get_ordering(self, request, queryset, view):
+        """Returns the requested ordering, with id added to break ties"""
+        ordering = request.query_params.get(self.ordering_param)
+        if not ordering:
+            return self.default_ordering
+        if ordering.lstrip("-") not in self.ordering_fields:
+            raise ValidationError(
+                {self.ordering_param: [f"Must be one of {self.ordering_fields}"]}
+            )
+        descending = "-" if ordering.startswith("-") else ""
+
+        return (ordering, f"{descending}id")
+
+    def parse_uuids(self, param, values):
+        try:
+            return [normalize_uuid(value) for value in values]
+        except ValueError:
+            raise ValidationError({param: ["Must be valid MC UUIDs"]})
+
+    def parse_datetime(self, param, value):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({param: ["Must be an ISO 8601 datetime"]})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def parse_bool(self, param, value):
+        if value.lower() in ("true", "1"):
+            return True
+        if value.lower() in ("false", "0"):
+            return False
+        raise ValidationError({param: ["Must be true or false"]})
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ezpunishments.punishment import archive
+
+
+class Command(BaseCommand):
+    """Django command to move cold punishments into the archive table
+
+    Rows are moved in short transactions of --batch-size so the live table
+    stays usable while a large backlog is archived.
+    """
+
+    help = "Archive inactive and long expired punishments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.PUNISHMENT_ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.PUNISHMENT_ARCHIVE_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        total = 0
+        while True:
+            moved = archive.archive_batch(cutoff, options["batch_size"])
+            if not moved:
+                break
+            total += moved
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Archived {total} punishments...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} punishments"))
@@ -0,0 +1,243 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from ezpunishments.core.models import Punishment
+from ezpunishments.core.mojang_stub import MojangStubServer
+from ezpunishments.punishment import stats
+
+
+BENCHMARK_REASON = "API benchmark"
+PASSWORD = "benchmark-password"
+QUERY_COUNT_HEADER = "X-Benchmark-Queries"
+
+# Relative weight of each endpoint in the request mix
+ENDPOINTS = {"list": 40, "retrieve": 40, "create": 15, "token": 5}
+
+
+def percentile(values, fraction):
+    """Returns the nearest rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def count_queries(application):
+    """Wraps a WSGI application to send how many queries each request ran"""
+
+    def counted(environ, start_response):
+        queries = []
+
+        def execute(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def start_counted_response(status, headers, exc_info=None):
+            headers = headers + [(QUERY_COUNT_HEADER, str(len(queries)))]
+            return start_response(status, headers, exc_info)
+
+        with connection.execute_wrapper(execute):
+            return application(environ, start_counted_response)
+
+    return counted
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    """Django command to load test the API over HTTP
+
+    The load runs against a throwaway test database, created from the
+    migrations next to the configured one and dropped afterwards. Nothing
+    seeded or written by the requests (stats, tombstones, profiles, tokens)
+    is left behind. Mojang lookups are answered by a local stub server.
+    """
+
+    help = "Measure API throughput and latency under concurrent load"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--punishments", type=int, default=10000)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--output", help="Write the JSON results to a file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        stub = MojangStubServer(generate=True).start()
+        server = ThreadedWSGIServer(
+            ("127.0.0.1", 0), QuietRequestHandler, allow_reuse_address=False
+        )
+        server.daemon_threads = True
+        server.set_app(count_queries(get_wsgi_application()))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        overrides = override_settings(
+            MOJANG_API_URL=stub.url, ALLOWED_HOSTS=["127.0.0.1"]
+        )
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        overrides.enable()
+        thread.start()
+        try:
+            self.seed(stub, options["users"], options["punishments"])
+            host, port = server.server_address[:2]
+            results = self.run(f"http://{host}:{port}", stub, options)
+        finally:
+            server.shutdown()
+            server.server_close()
+            overrides.disable()
+            stub.stop()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def seed(self, stub, users, punishments):
+        """Seeds staff users with tokens and punishments against random players"""
+        password = make_password(PASSWORD)
+        self.users = get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    username=f"bench{i}",
+                    mc_uuid=stub.lookup(f"bench{i}"),
+                    password=password,
+                )
+                for i in range(users)
+            ]
+        )
+        self.tokens = [Token.objects.create(user=user).key for user in self.users]
+
+        now = timezone.now()
+        seeded = []
+        for i in range(punishments):
+            staff = self.random.choice(self.users)
+            username = f"player{i}"
+            seeded.append(
+                Punishment(
+                    mc_username=username,
+                    mc_uuid=stub.lookup(username),
+                    reason=BENCHMARK_REASON,
+                    punished_by=staff.username,
+                    punished_by_uuid=staff.mc_uuid,
+                    expires=now + timedelta(minutes=self.random.randint(-10000, 50000)),
+                )
+            )
+        seeded = Punishment.objects.bulk_create(seeded, batch_size=5000)
+        stats.record_created(seeded)
+        self.punishment_ids = [punishment.id for punishment in seeded]
+
+    def run(self, base_url, stub, options):
+        """Sends the request mix from concurrent clients and summarizes it"""
+        urls = {
+            "list": base_url + reverse("punishment:punishment-list"),
+            "token": base_url + reverse("user:token"),
+        }
+        plan = self.random.choices(
+            list(ENDPOINTS), weights=list(ENDPOINTS.values()), k=options["requests"]
+        )
+        sessions = threading.local()
+        stub_requests = len(stub.requests)
+
+        def send(endpoint):
+            session = getattr(sessions, "session", None)
+            if session is None:
+                session = sessions.session = requests.Session()
+            user = self.random.randrange(len(self.users))
+            headers = {"Authorization": f"Token {self.tokens[user]}"}
+            if endpoint == "list":
+                request = ("get", urls["list"], {"params": {"page_size": 100}})
+            elif endpoint == "retrieve":
+                pk = self.random.choice(self.punishment_ids)
+                request = ("get", f"{urls['list']}{pk}/", {})
+            elif endpoint == "create":
+                player = f"player{self.random.randrange(10 ** 6)}"
+                body = {
+                    "mc_username": player,
+                    "reason": BENCHMARK_REASON,
+                    "punished_by": self.users[user].username,
+                    "expires": (timezone.now() + timedelta(days=1)).isoformat(),
+                }
+                request = ("post", urls["list"], {"json": body})
+            else:
+                headers = {}
+                body = {"username": self.users[user].username, "password": PASSWORD}
+                request = ("post", urls["token"], {"json": body})
+
+            method, url, kwargs = request
+            start = time.perf_counter()
+            response = session.request(method, url, headers=headers, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            return (
+                endpoint,
+                elapsed,
+                response.status_code < 400,
+                int(response.headers.get(QUERY_COUNT_HEADER, 0)),
+            )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            samples = list(executor.map(send, plan))
+        duration = time.perf_counter() - start
+
+        by_endpoint = defaultdict(list)
+        for sample in samples:
+            by_endpoint[sample[0]].append(sample)
+        results = {
+            name: self.summarize(by_endpoint[name], duration)
+            for name in ENDPOINTS
+            if by_endpoint[name]
+        }
+        results["total"] = self.summarize(samples, duration)
+
+        return {
+            "users": options["users"],
+            "punishments": options["punishments"],
+            "concurrency": options["concurrency"],
+            "duration_s": round(duration, 3),
+            "mojang_requests": len(stub.requests) - stub_requests,
+            "endpoints": results,
+        }
+
+    def summarize(self, samples, duration):
+        latencies = sorted(elapsed * 1000 for _, elapsed, _, _ in samples)
+        queries = [count for _, _, _, count in samples]
+
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for _, _, ok, _ in samples if not ok),
+            "rps": round(len(samples) / duration, 1),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "queries_per_request": round(sum(queries) / len(queries), 2),
+        }
@@ -0,0 +1,82 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ezpunishments.core.models import Punishment
+from ezpunishments.core.renderers import FastJSONRenderer, orjson
+from ezpunishments.punishment.encoders import RowEncoder
+from ezpunishments.punishment.serializers import PunishmentSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare list serialization throughput
+
+    Rows are seeded inside a transaction that is rolled back at the end.
+    """
+
+    help = "Benchmark PunishmentSerializer against the values() fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["rows"])
+            encoder = RowEncoder(PunishmentSerializer)
+            queryset = Punishment.objects.order_by("-date_punished", "-id")
+
+            def serializer_path():
+                data = PunishmentSerializer(queryset.all(), many=True).data
+                return JSONRenderer().render(data)
+
+            def fast_path():
+                rows = queryset.values(*encoder.sources)
+                return FastJSONRenderer().render(encoder.encode_all(rows))
+
+            results = {
+                "serializer": self.measure(serializer_path, options),
+                "fast path": self.measure(fast_path, options),
+            }
+            identical = serializer_path() == fast_path()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"orjson installed: {orjson is not None}")
+        self.stdout.write(f"identical output: {identical}")
+        for name, seconds in results.items():
+            rate = options["rows"] / seconds
+            self.stdout.write(f"{name:<12}{rate:>14,.0f} rows/sec")
+
+    def seed(self, rows):
+        now = timezone.now()
+        Punishment.objects.bulk_create(
+            [
+                Punishment(
+                    mc_username=f"player{i}",
+                    mc_uuid=uuid.uuid4(),
+                    reason="Benchmark",
+                    proof="https://example.com/proof",
+                    punished_by="smiileyface",
+                    punished_by_uuid=uuid.uuid4(),
+                    expires=now + timedelta(days=i % 30),
+                )
+                for i in range(rows)
+            ],
+            batch_size=5000,
+        )
+
+    def measure(self, func, options):
+        """Returns the best wall time in seconds over repeat runs of func"""
+        best = None
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ezpunishments.punishment import snapshot
+
+
+class Command(BaseCommand):
+    """Django command to build or update the binary ban snapshot
+
+    Without --full only players whose punishments changed since the last
+    run are looked up again, so it's cheap enough to run every few seconds.
+    The API only serves the file, so this needs to run on a schedule.
+    """
+
+    help = "Build the binary snapshot of active bans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None)
+        parser.add_argument(
+            "--full", action="store_true", help="Rebuild instead of updating"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"] or settings.PUNISHMENT_SNAPSHOT_PATH
+        with snapshot.locked(path):
+            if options["full"]:
+                try:
+                    with snapshot.BanSnapshot(path) as current:
+                        version = current.version + 1
+                except (FileNotFoundError, ValueError):
+                    version = 1
+                snapshot.build(path, version)
+            elif not snapshot.refresh(path):
+                self.stdout.write("Snapshot is already up to date")
+                return
+
+        with snapshot.BanSnapshot(path) as current:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Wrote snapshot version {current.version} "
+                    f"with {len(current)} bans to {path}"
+                )
+            )
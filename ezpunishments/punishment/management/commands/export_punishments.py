@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from ezpunishments.core.models import Punishment
+from ezpunishments.punishment import export
+
+
+class Command(BaseCommand):
+    """Django command to stream every punishment to a file or stdout"""
+
+    help = "Export punishments as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(export.CONTENT_TYPES), default="ndjson"
+        )
+        parser.add_argument("--output", help="File to write to, defaults to stdout")
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        lines = export.export_lines(
+            Punishment.objects.all(), options["format"], options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as out:
+                out.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
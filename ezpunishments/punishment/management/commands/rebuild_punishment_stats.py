@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ezpunishments.core.models import PunishmentDailyStats, PunishmentExpiryStats
+from ezpunishments.punishment import stats
+
+
+class Command(BaseCommand):
+    """Django command to recompute the punishment summary tables from scratch"""
+
+    help = "Rebuild the punishment statistics tables"
+
+    def handle(self, *args, **options):
+        stats.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {PunishmentDailyStats.objects.count()} daily and "
+                f"{PunishmentExpiryStats.objects.count()} expiry rows"
+            )
+        )
@@ -0,0 +1,56 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ezpunishments.punishment import resolution
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Django command to backfill UUIDs for punishments created asynchronously
+
+    Due jobs are taken in batches of --batch-size, so several workers can
+    run side by side. Lookups that fail while Mojang is unavailable are
+    retried later with a growing delay. Errors are logged and the batch is
+    tried again after --interval, so the worker keeps running.
+    """
+
+    help = "Resolve queued punishment UUIDs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.PUNISHMENT_RESOLVE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for new jobs once the queue is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no jobs are due"
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            try:
+                taken = resolution.resolve_batch(options["batch_size"])
+            except Exception:
+                logger.exception("Resolving a batch of UUIDs failed")
+                close_old_connections()
+                taken = 0
+            total += taken
+            if taken and options["verbosity"] > 1:
+                self.stdout.write(f"Processed {total} jobs...")
+            if not taken:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} jobs"))
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class PunishmentCursorPagination(CursorPagination):
+    """Keyset pagination over punishments, newest first, without COUNT(*)"""
+
+    ordering = ("-date_punished", "-id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class PunishmentSearchPagination(LimitOffsetPagination):
+    """Offset pagination for ranked search results, without COUNT(*)
+
+    Results are ordered by rank so there's no key to page on. One extra row
+    is read to tell whether there is a next page.
+    """
+
+    default_limit = 50
+    max_limit = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        start, stop = self.offset, self.offset + self.limit + 1
+        rows = list(queryset[start:stop])
+        self.has_next = len(rows) > self.limit
+
+        return rows[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
@@ -0,0 +1,164 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ezpunishments.core.models import UUIDResolutionJob, get_mc_uuids
+from ezpunishments.core.mojang import MojangUnavailable
+
+
+logger = logging.getLogger(__name__)
+
+
+def due_jobs():
+    return UUIDResolutionJob.objects.filter(
+        status=UUIDResolutionJob.PENDING, run_after__lte=timezone.now()
+    )
+
+
+def missing_uuids(punishment):
+    """Returns (field, username) for each UUID punishment is still missing"""
+    return [
+        (field, username)
+        for field, username in (
+            ("mc_uuid", punishment.mc_username),
+            ("punished_by_uuid", punishment.punished_by),
+        )
+        if getattr(punishment, field) is None
+    ]
+
+
+def retry_delay(attempts):
+    """Returns how long to wait before another try, doubling every attempt"""
+    delay = settings.PUNISHMENT_RESOLVE_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.PUNISHMENT_RESOLVE_MAX_DELAY))
+
+
+def fail(job, error, retry):
+    """Records a failed attempt, giving up once retries run out or aren't useful"""
+    job.attempts += 1
+    job.last_error = error[:255]
+    if retry and job.attempts < settings.PUNISHMENT_RESOLVE_MAX_ATTEMPTS:
+        job.run_after = timezone.now() + retry_delay(job.attempts)
+    else:
+        job.status = UUIDResolutionJob.FAILED
+
+
+def describe(exc):
+    return f"{type(exc).__name__}: {exc}"
+
+
+def backfill(punishment, mc_uuids):
+    """Saves the UUIDs found in mc_uuids, returning the usernames still unknown"""
+    unknown = []
+    resolved = []
+    for field, username in missing_uuids(punishment):
+        if username in mc_uuids:
+            setattr(punishment, field, mc_uuids[username])
+            resolved.append(field)
+        else:
+            unknown.append(username)
+    if resolved:
+        punishment.save(update_fields=resolved + ["last_updated"])
+    return unknown
+
+
+def claim(batch_size):
+    """Leases a batch of due jobs, returning them and when the lease runs out
+
+    Jobs locked by another worker are skipped. The lease pushes run_after
+    back so the jobs aren't due for anyone else while they're looked up.
+    """
+    lease = timezone.now() + timedelta(seconds=settings.PUNISHMENT_RESOLVE_LEASE)
+    with transaction.atomic():
+        jobs = list(
+            due_jobs()
+            .select_related("punishment")
+            .order_by("run_after", "id")
+            .select_for_update(skip_locked=True, of=("self",))[:batch_size]
+        )
+        for job in jobs:
+            job.run_after = lease
+        UUIDResolutionJob.objects.bulk_update(jobs, ["run_after"])
+
+    return jobs, lease
+
+
+def leased(jobs, lease):
+    """Locks and returns the jobs still held under lease, with fresh punishments
+
+    Jobs that were deleted with their punishment, or taken over by another
+    worker after the lease ran out, are left out.
+    """
+    return list(
+        UUIDResolutionJob.objects.filter(
+            id__in=[job.id for job in jobs], run_after=lease
+        )
+        .select_related("punishment")
+        .select_for_update(of=("self",))
+        .order_by("id")
+    )
+
+
+def resolve_batch(batch_size):
+    """Resolves the UUIDs for one batch of due jobs, returning how many it took
+
+    All the usernames in the batch are looked up together, outside of any
+    transaction, so no rows stay locked while Mojang is slow. Saving the
+    backfilled punishments sends the usual signals, so caches, stats and
+    event streams pick up the UUIDs. Any other error fails only the jobs
+    it affected, to be retried later like an outage.
+    """
+    jobs, lease = claim(batch_size)
+    claimed = len(jobs)
+    if not claimed:
+        return 0
+
+    usernames = {
+        username for job in jobs for _, username in missing_uuids(job.punishment)
+    }
+    try:
+        mc_uuids = get_mc_uuids(sorted(usernames))
+    except Exception as exc:
+        if isinstance(exc, MojangUnavailable):
+            error = str(exc)
+        else:
+            logger.exception("Looking up %d usernames failed", len(usernames))
+            error = describe(exc)
+        with transaction.atomic():
+            jobs = leased(jobs, lease)
+            for job in jobs:
+                fail(job, error, retry=True)
+            UUIDResolutionJob.objects.bulk_update(
+                jobs, ["status", "attempts", "run_after", "last_error"]
+            )
+        return claimed
+
+    with transaction.atomic():
+        jobs = leased(jobs, lease)
+        updated = []
+        for job in jobs:
+            try:
+                with transaction.atomic():
+                    unknown = backfill(job.punishment, mc_uuids)
+            except Exception as exc:
+                logger.exception("Backfilling punishment %d failed", job.punishment_id)
+                fail(job, describe(exc), retry=True)
+                updated.append(job)
+                continue
+            if any(username not in usernames for username in unknown):
+                # Renamed since it was claimed, so look it up again
+                job.run_after = timezone.now()
+                updated.append(job)
+            elif unknown:
+                fail(job, f"Unknown MC usernames: {', '.join(unknown)}", retry=False)
+                updated.append(job)
+            else:
+                job.delete()
+        UUIDResolutionJob.objects.bulk_update(
+            updated, ["status", "attempts", "run_after", "last_error"]
+        )
+
+    return claimed
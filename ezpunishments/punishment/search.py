@@ -0,0 +1,40 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Func, Value
+
+
+# The punishment_search_idx GIN index covers this exact expression, see
+# migration core 0015. Change both together or searches stop using it.
+SEARCH_CONFIG = "english"
+
+# The parser keeps a URL as one token, so these are spaced out first to
+# make the host, path segments and ids in proof links words of their own
+URL_SEPARATORS = "[/:?#&=.]+"
+
+
+def document():
+    """Returns the text search document for a punishment's reason and proof"""
+    proof = Func(
+        "proof",
+        Value(URL_SEPARATORS),
+        Value(" "),
+        Value("g"),
+        function="regexp_replace",
+    )
+    return SearchVector("reason", proof, config=SEARCH_CONFIG)
+
+
+def search(queryset, text):
+    """Returns the punishments matching text, best match first
+
+    text is read like a web search: words must all appear, "quoted phrases"
+    must appear in order, "or" gives alternatives and -word excludes. Words
+    in proof URLs match like any other, but only whole words, not substrings.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+    return (
+        queryset.annotate(document=document())
+        .filter(document=query)
+        .annotate(rank=SearchRank(F("document"), query))
+        .order_by("-rank", "-date_punished", "-id")
+    )
@@ -1,9 +1,19 @@
-from rest_framework import serializers
-
 from ezpunishments.core.models import Punishment
+from ezpunishments.core.serializers import MCUUIDModelSerializer
+
+
+class SparseFieldsMixin:
+    """Drops any fields not listed in the serializer's fields context"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get("fields")
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
 
 
-class PunishmentSerializer(serializers.ModelSerializer):
+class PunishmentSerializer(SparseFieldsMixin, MCUUIDModelSerializer):
     """Serializer for punishment objects"""
 
     class Meta:
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ezpunishments.core.models import Punishment, PunishmentTombstone
+from . import bans, events, stats
+
+
+@receiver(post_save, sender=Punishment)
+@receiver(post_delete, sender=Punishment)
+def invalidate_active_punishment(sender, instance, **kwargs):
+    """Drops the cached ban check for the punished player"""
+    bans.invalidate([instance.mc_uuid])
+
+
+@receiver(post_delete, sender=Punishment)
+def record_tombstone(sender, instance, **kwargs):
+    """Keeps a record of the deleted punishment for the changes feed"""
+    PunishmentTombstone.objects.create(
+        punishment_id=instance.pk, mc_uuid=instance.mc_uuid
+    )
+
+
+@receiver(post_save, sender=Punishment)
+def publish_saved(sender, instance, created, **kwargs):
+    """Streams the saved punishment to connected clients"""
+    if created:
+        event_type = "created"
+    elif not instance.is_active:
+        event_type = "revoked"
+    else:
+        event_type = "updated"
+    events.publish(event_type, [instance])
+
+
+@receiver(post_delete, sender=Punishment)
+def publish_deleted(sender, instance, **kwargs):
+    events.publish("deleted", [instance])
+
+
+@receiver(pre_save, sender=Punishment)
+def remember_stats_state(sender, instance, raw=False, **kwargs):
+    """Keeps what the stats depend on from before the save"""
+    instance._stats_previous = None
+    if not raw and not instance._state.adding:
+        instance._stats_previous = (
+            Punishment.objects.filter(pk=instance.pk)
+            .values("is_active", "expires", "punished_by_uuid")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Punishment)
+def update_stats(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stats.record_saved(instance._stats_previous, instance)
+
+
+@receiver(post_delete, sender=Punishment)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.record_deleted([instance])
@@ -0,0 +1,246 @@
+import bisect
+import fcntl
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Max
+from django.utils import timezone
+
+from ezpunishments.core.models import Punishment
+from . import sync
+from .encoders import get_row_encoder
+from .serializers import PunishmentSerializer
+
+
+# A snapshot file is a header, the changes feed cursor it was built up to and
+# then one record per banned MC UUID, sorted by UUID bytes:
+#
+#   header  magic, format version, reserved, snapshot version, generated at
+#           (unix seconds), record count, cursor length
+#   cursor  utf-8 changes feed cursor
+#   record  16 byte UUID, expiry as unsigned unix seconds
+#
+# Everything is little endian. The snapshot version goes up by one every
+# time the file is rewritten, so clients can tell whether to download it.
+MAGIC = b"EZBS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHQqIH")
+Header = namedtuple(
+    "Header",
+    "magic format_version reserved version generated_at count cursor_length",
+)
+RECORD = struct.Struct("<16sI")
+MAX_EXPIRY = 2**32 - 1
+
+CONTENT_TYPE = "application/octet-stream"
+
+
+def uuid_bytes(mc_uuid):
+    return uuid.UUID(str(mc_uuid)).bytes
+
+
+def expiry_seconds(expires):
+    """Returns expires as unix seconds, capped to what a record can hold"""
+    return min(int(expires.timestamp()), MAX_EXPIRY)
+
+
+def read_header(snapshot_file):
+    """Returns the header fields and cursor of an open snapshot file"""
+    data = snapshot_file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Not a ban snapshot")
+    header = Header._make(HEADER.unpack(data))
+    if header.magic != MAGIC or header.format_version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} ban snapshot")
+
+    return {
+        "version": header.version,
+        "generated_at": datetime.fromtimestamp(header.generated_at, dt_timezone.utc),
+        "count": header.count,
+        "cursor": snapshot_file.read(header.cursor_length).decode(),
+        "offset": HEADER.size + header.cursor_length,
+    }
+
+
+class BanSnapshot:
+    """Memory mapped ban snapshot, looked up with a binary search
+
+    Indexing a snapshot returns the UUID bytes of that record, which is
+    what lets bisect search it without reading the whole file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as snapshot_file:
+            header = read_header(snapshot_file)
+            self.mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.version = header["version"]
+        self.generated_at = header["generated_at"]
+        self.cursor = header["cursor"]
+        self.count = header["count"]
+        self.offset = header["offset"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        start = self.offset + index * RECORD.size
+        end = start + 16
+        return self.mmap[start:end]
+
+    def close(self):
+        self.mmap.close()
+
+    def records(self):
+        """Yields (UUID bytes, expiry seconds) for every record in order"""
+        for index in range(self.count):
+            yield RECORD.unpack_from(self.mmap, self.offset + index * RECORD.size)
+
+    def expires(self, mc_uuid):
+        """Returns when the ban on mc_uuid expires, or None if there isn't one"""
+        key = uuid_bytes(mc_uuid)
+        index = bisect.bisect_left(self, key)
+        if index == self.count or self[index] != key:
+            return None
+        _, expires = RECORD.unpack_from(self.mmap, self.offset + index * RECORD.size)
+        return datetime.fromtimestamp(expires, dt_timezone.utc)
+
+    def is_banned(self, mc_uuid, now=None):
+        expires = self.expires(mc_uuid)
+        return expires is not None and expires > (now or timezone.now())
+
+
+def active_bans(mc_uuids=None):
+    """Returns sorted (UUID bytes, expiry seconds) for the active bans
+
+    Players with more than one active punishment get the longest one.
+    """
+    queryset = Punishment.objects.filter(
+        is_active=True, expires__gt=timezone.now(), mc_uuid__isnull=False
+    )
+    if mc_uuids is not None:
+        queryset = queryset.filter(mc_uuid__in=mc_uuids)
+    rows = (
+        queryset.order_by()
+        .values("mc_uuid")
+        .annotate(until=Max("expires"))
+        .values_list("mc_uuid", "until")
+    )
+
+    return sorted(
+        (uuid_bytes(mc_uuid), expiry_seconds(until)) for mc_uuid, until in rows
+    )
+
+
+def write(path, records, version, cursor):
+    """Atomically replaces path with a snapshot of the sorted records
+
+    Readers that already have the old file mapped keep reading it.
+    """
+    cursor = cursor.encode()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".bans-")
+    try:
+        with os.fdopen(descriptor, "wb") as snapshot_file:
+            snapshot_file.write(b"\0" * HEADER.size + cursor)
+            count = 0
+            for record in records:
+                snapshot_file.write(RECORD.pack(*record))
+                count += 1
+            snapshot_file.seek(0)
+            snapshot_file.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    0,
+                    version,
+                    int(timezone.now().timestamp()),
+                    count,
+                    len(cursor),
+                )
+            )
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+@contextmanager
+def locked(path):
+    """Holds an exclusive lock for updating the snapshot at path
+
+    Builds in other processes wait, so two of them can't write different
+    records under the same version.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def build(path, version=1):
+    """Writes a snapshot of every active ban to path"""
+    cursor = sync.current_cursor()
+    write(path, active_bans(), version, cursor)
+
+
+def changed_uuids(cursor):
+    """Returns the MC UUIDs with punishments changed since cursor, and a new cursor"""
+    encoder = get_row_encoder(PunishmentSerializer, frozenset(["mc_uuid"]))
+    mc_uuids = set()
+    while True:
+        page = sync.get_changes(encoder, cursor)
+        mc_uuids.update(row["mc_uuid"] for row in page["changed"] + page["deleted"])
+        cursor = page["cursor"]
+        if not page["more"]:
+            mc_uuids.discard(None)
+            return mc_uuids, cursor
+
+
+def refresh(path):
+    """Brings the snapshot at path up to date, returning whether it changed
+
+    Only players whose punishments changed since the snapshot's cursor are
+    looked up again, the rest of the records are copied across, dropping
+    any that have expired. A missing or unreadable snapshot is rebuilt.
+    """
+    try:
+        snapshot = BanSnapshot(path)
+    except (FileNotFoundError, ValueError):
+        build(path)
+        return True
+
+    with snapshot:
+        mc_uuids, cursor = changed_uuids(snapshot.cursor)
+        if not mc_uuids:
+            return False
+        changed = {uuid_bytes(mc_uuid) for mc_uuid in mc_uuids}
+        now = timezone.now().timestamp()
+        kept = (
+            record
+            for record in snapshot.records()
+            if record[0] not in changed and record[1] > now
+        )
+        records = heapq.merge(kept, active_bans(mc_uuids))
+        write(path, records, snapshot.version + 1, cursor)
+
+    return True
@@ -0,0 +1,207 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ezpunishments.core.models import (
+    Punishment,
+    PunishmentArchive,
+    PunishmentDailyStats,
+    PunishmentExpiryStats,
+)
+from ezpunishments.core.mojang import normalize_uuid
+
+
+# Dashboards read two summary tables instead of grouping raw punishments:
+#
+#   PunishmentDailyStats   punishments created by each moderator per day, and
+#                          how many of theirs were revoked per day
+#   PunishmentExpiryStats  active punishments by the day they expire, so the
+#                          active count is a sum over the days still to come
+#
+# Both are kept up to date by signals and can be rebuilt with rebuild().
+
+
+def day_of(value):
+    return timezone.localdate(value)
+
+
+def increment(model, keys, defaults=None, **deltas):
+    """Adds deltas to the counters on the row for keys, creating it if needed"""
+    model.objects.bulk_create(
+        [model(**keys, **(defaults or {}))], ignore_conflicts=True
+    )
+    model.objects.filter(**keys).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+
+def record_created(punishments):
+    """Counts newly created punishments"""
+    names = {}
+    created = Counter()
+    for punishment in punishments:
+        # Counted once the moderator's UUID has been resolved
+        if punishment.punished_by_uuid is None:
+            continue
+        moderator = normalize_uuid(punishment.punished_by_uuid)
+        names[moderator] = punishment.punished_by
+        created[day_of(punishment.date_punished), moderator] += 1
+    for (day, moderator), count in created.items():
+        increment(
+            PunishmentDailyStats,
+            {"day": day, "punished_by_uuid": moderator},
+            {"punished_by": names[moderator]},
+            created=count,
+        )
+
+    active = Counter(day_of(p.expires) for p in punishments if p.is_active)
+    for day, count in active.items():
+        increment(PunishmentExpiryStats, {"day": day}, active=count)
+
+
+def record_saved(previous, punishment):
+    """Counts an update to punishment, given the fields stats use from before"""
+    if previous is None:
+        return record_created([punishment])
+
+    resolved = punishment.punished_by_uuid is not None
+    backfilled = previous["punished_by_uuid"] is None and resolved
+    if backfilled:
+        increment(
+            PunishmentDailyStats,
+            {
+                "day": day_of(punishment.date_punished),
+                "punished_by_uuid": normalize_uuid(punishment.punished_by_uuid),
+            },
+            {"punished_by": punishment.punished_by},
+            created=1,
+        )
+    was_active = previous["is_active"]
+    # A punishment revoked before its moderator was resolved wasn't counted yet
+    if not punishment.is_active and (backfilled or was_active and resolved):
+        increment(
+            PunishmentDailyStats,
+            {
+                "day": timezone.localdate(),
+                "punished_by_uuid": normalize_uuid(punishment.punished_by_uuid),
+            },
+            {"punished_by": punishment.punished_by},
+            revoked=1,
+        )
+    if (was_active, day_of(previous["expires"])) == (
+        punishment.is_active,
+        day_of(punishment.expires),
+    ):
+        return
+    if was_active:
+        increment(
+            PunishmentExpiryStats, {"day": day_of(previous["expires"])}, active=-1
+        )
+    if punishment.is_active:
+        increment(PunishmentExpiryStats, {"day": day_of(punishment.expires)}, active=1)
+
+
+def record_deleted(punishments):
+    """Uncounts deleted punishments"""
+    active = Counter(day_of(p.expires) for p in punishments if p.is_active)
+    for day, count in active.items():
+        increment(PunishmentExpiryStats, {"day": day}, active=-count)
+
+
+def rebuild():
+    """Recomputes both summary tables from the live and archived punishments
+
+    Revocations are counted on the day the punishment was last updated,
+    which is when it was revoked unless it was edited again afterwards.
+    """
+    daily = {}
+    for model in (Punishment, PunishmentArchive):
+        moderators = (
+            model.objects.filter(punished_by_uuid__isnull=False)
+            .order_by()
+            .values("punished_by_uuid")
+        )
+        created = (
+            moderators.annotate(day=TruncDate("date_punished"))
+            .values("day", "punished_by_uuid")
+            .annotate(count=Count("id"), name=Max("punished_by"))
+        )
+        revoked = (
+            moderators.filter(is_active=False)
+            .annotate(day=TruncDate("last_updated"))
+            .values("day", "punished_by_uuid")
+            .annotate(count=Count("id"), name=Max("punished_by"))
+        )
+        for rows, counter in ((created, "created"), (revoked, "revoked")):
+            for row in rows:
+                key = (row["day"], row["punished_by_uuid"])
+                stats = daily.setdefault(
+                    key,
+                    PunishmentDailyStats(
+                        day=row["day"],
+                        punished_by_uuid=row["punished_by_uuid"],
+                        punished_by=row["name"],
+                    ),
+                )
+                setattr(stats, counter, getattr(stats, counter) + row["count"])
+
+    expiring = (
+        Punishment.objects.filter(is_active=True, expires__gt=timezone.now())
+        .order_by()
+        .annotate(day=TruncDate("expires"))
+        .values("day")
+        .annotate(active=Count("id"))
+    )
+
+    with transaction.atomic():
+        PunishmentDailyStats.objects.all().delete()
+        PunishmentExpiryStats.objects.all().delete()
+        PunishmentDailyStats.objects.bulk_create(daily.values(), batch_size=1000)
+        PunishmentExpiryStats.objects.bulk_create(
+            [PunishmentExpiryStats(**row) for row in expiring], batch_size=1000
+        )
+
+
+def active_count():
+    """Returns how many punishments are active right now
+
+    Whole days still to come are read from the summary table, the rest of
+    today is counted from the live table through the active expiry index.
+    """
+    today = timezone.localdate()
+    tomorrow = timezone.make_aware(datetime.combine(today + timedelta(1), time()))
+    later = PunishmentExpiryStats.objects.filter(day__gt=today).aggregate(
+        active=Sum("active")
+    )["active"]
+    today_count = Punishment.objects.filter(
+        is_active=True, expires__gt=timezone.now(), expires__lt=tomorrow
+    ).count()
+
+    return (later or 0) + today_count
+
+
+def summary(since, until, punished_by_uuids=None):
+    """Returns daily and per moderator totals between two dates, inclusive"""
+    rows = PunishmentDailyStats.objects.filter(day__gte=since, day__lte=until)
+    if punished_by_uuids:
+        rows = rows.filter(punished_by_uuid__in=punished_by_uuids)
+    totals = {"created": Sum("created"), "revoked": Sum("revoked")}
+    daily = rows.values("day").annotate(**totals).order_by("day")
+    moderators = (
+        rows.values("punished_by_uuid")
+        .annotate(punished_by=Max("punished_by"), **totals)
+        .order_by("-created", "punished_by_uuid")
+    )
+
+    return {
+        "active": active_count(),
+        "daily": list(daily),
+        "moderators": [
+            dict(row, punished_by_uuid=normalize_uuid(row["punished_by_uuid"]))
+            for row in moderators
+        ],
+    }
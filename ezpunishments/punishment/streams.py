@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest
+from rest_framework import exceptions, status
+
+from ezpunishments.user.service_tokens import ServiceToken
+from . import events
+from .views import PunishmentViewSet
+
+
+def authenticate(headers):
+    """Returns the status to refuse a stream with, or None if it's allowed
+
+    Uses the same authentication classes and read scope as PunishmentViewSet.
+    """
+    request = HttpRequest()
+    authorization = headers.get(b"authorization")
+    if authorization:
+        request.META["HTTP_AUTHORIZATION"] = authorization.decode("latin-1")
+
+    try:
+        for authentication_class in PunishmentViewSet.authentication_classes:
+            credentials = authentication_class().authenticate(request)
+            if credentials is not None:
+                break
+        else:
+            return status.HTTP_401_UNAUTHORIZED
+    except exceptions.AuthenticationFailed:
+        return status.HTTP_401_UNAUTHORIZED
+
+    _, token = credentials
+    if isinstance(token, ServiceToken) and not token.has_scope(
+        PunishmentViewSet.read_scope
+    ):
+        return status.HTTP_403_FORBIDDEN
+    return None
+
+
+async def send_error(send, status_code):
+    body = json.dumps({"detail": "Unable to open the event stream"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def event_stream(scope, receive, send):
+    """Streams punishment events to the client as Server-Sent Events
+
+    Comment lines are sent every PUNISHMENT_EVENTS_KEEPALIVE seconds so
+    proxies don't time out idle streams. Events missed while disconnected
+    can be fetched from the changes feed.
+    """
+    if scope["method"] != "GET":
+        return await send_error(send, status.HTTP_405_METHOD_NOT_ALLOWED)
+    refused = await sync_to_async(authenticate)(dict(scope["headers"]))
+    if refused:
+        return await send_error(send, refused)
+
+    subscription = events.get_broker().subscribe()
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status.HTTP_200_OK,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b": connected\n\n",
+                "more_body": True,
+            }
+        )
+        while True:
+            frame = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {frame, disconnect},
+                timeout=settings.PUNISHMENT_EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnect in done:
+                frame.cancel()
+                break
+            if frame in done:
+                body = frame.result()
+                if body is None:
+                    break
+            else:
+                frame.cancel()
+                body = b": keepalive\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        if not disconnect.done():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        subscription.close()
+        disconnect.cancel()
+
+
+class EventStreamRouter:
+    """ASGI app sending PUNISHMENT_EVENTS_PATH to the event stream
+
+    Everything else goes to the wrapped Django application.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == settings.PUNISHMENT_EVENTS_PATH:
+            return await event_stream(scope, receive, send)
+        return await self.application(scope, receive, send)
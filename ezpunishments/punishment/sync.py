@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ezpunishments.core.models import Punishment, PunishmentTombstone
+from ezpunishments.core.mojang import normalize_uuid
+
+
+def encode_cursor(position):
+    """Returns an opaque cursor for the last row and tombstone already sent"""
+    data = {
+        key: (moment.isoformat(), pk) if moment else None
+        for key, (moment, pk) in position.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns the position a cursor points at, raising ValueError if invalid"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position = {}
+        for key in ("rows", "tombstones"):
+            if data[key] is None:
+                position[key] = (None, None)
+                continue
+            moment, pk = data[key]
+            moment = parse_datetime(moment)
+            if moment is None or not isinstance(pk, int):
+                raise ValueError("Invalid cursor")
+            position[key] = (moment, pk)
+    except (binascii.Error, KeyError, TypeError, UnicodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+    return position
+
+
+def after(queryset, field, position):
+    """Filters queryset to what comes after position in (field, id) order"""
+    moment, pk = position
+    if moment is None:
+        return queryset
+    return queryset.filter(
+        Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk})
+    )
+
+
+def next_page(queryset, field, position, limit):
+    """Returns up to limit rows after position, the new position and if more remain"""
+    rows = list(after(queryset, field, position).order_by(field, "id")[: limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        position = (rows[-1][field], rows[-1]["id"])
+    return rows, position, more
+
+
+def get_until():
+    """Returns the newest point the feed will read up to"""
+    return timezone.now() - timedelta(seconds=settings.PUNISHMENT_CHANGES_LAG)
+
+
+def current_cursor():
+    """Returns a cursor that skips everything already saved or deleted"""
+    until = get_until()
+    return encode_cursor({"rows": (until, 0), "tombstones": (until, 0)})
+
+
+def encode_tombstone(tombstone):
+    """Returns the deleted entry for a tombstone, whose UUID may be unresolved"""
+    mc_uuid = tombstone["mc_uuid"]
+    return {
+        "id": tombstone["punishment_id"],
+        "mc_uuid": normalize_uuid(mc_uuid) if mc_uuid else None,
+    }
+
+
+def get_changes(encoder, cursor=None, limit=None):
+    """Returns the punishments saved and deleted since cursor
+
+    Rows are read in (last_updated, id) order and tombstones in
+    (deleted_at, id) order, each from where the cursor left off, so a sync
+    only touches what changed. Without a cursor every punishment is sent
+    and deletions start from now. Clients should apply changed rows before
+    deleted ones.
+    """
+    limit = limit or settings.PUNISHMENT_CHANGES_PAGE_SIZE
+    until = get_until()
+    if cursor:
+        position = decode_cursor(cursor)
+    else:
+        position = {"rows": (None, None), "tombstones": (until, 0)}
+
+    sources = dict.fromkeys(encoder.sources + ("last_updated", "id"))
+    rows, position["rows"], more_rows = next_page(
+        Punishment.objects.filter(last_updated__lte=until).values(*sources),
+        "last_updated",
+        position["rows"],
+        limit,
+    )
+    tombstones, position["tombstones"], more_tombstones = next_page(
+        PunishmentTombstone.objects.filter(deleted_at__lte=until).values(
+            "id", "punishment_id", "mc_uuid", "deleted_at"
+        ),
+        "deleted_at",
+        position["tombstones"],
+        limit,
+    )
+
+    return {
+        "changed": encoder.encode_all(rows),
+        "deleted": [encode_tombstone(tombstone) for tombstone in tombstones],
+        "cursor": encode_cursor(position),
+        "more": more_rows or more_tombstones,
+    }
@@ -0,0 +1,205 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from ezpunishments.core.models import (
+    MinecraftProfile,
+    Punishment,
+    PunishmentArchive,
+    PunishmentDailyStats,
+    PunishmentExpiryStats,
+    PunishmentTombstone,
+    UUIDResolutionJob,
+)
+from ezpunishments.core.mojang_stub import MojangStubServer
+from ezpunishments.core.tests.utils import MojangStubMixin
+from ezpunishments.punishment import archive, resolution
+
+
+class CommandTests(MojangStubMixin, TestCase):
+    def test_export_punishments(self):
+        """Test exporting punishments to stdout"""
+        punishment = Punishment.objects.create(
+            mc_username="SamieMarie",
+            reason="Being a noob",
+            punished_by="smiileyface",
+            expires=datetime.now() + timedelta(days=7),
+        )
+        out = StringIO()
+        call_command("export_punishments", chunk_size=1, stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], punishment.id)
+        self.assertEqual(rows[0]["mc_username"], "SamieMarie")
+
+    def test_build_ban_snapshot(self):
+        """Test building and then updating the ban snapshot"""
+        Punishment.objects.create(
+            mc_username="SamieMarie",
+            reason="Being a noob",
+            punished_by="smiileyface",
+            expires=datetime.now() + timedelta(days=7),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bans.snapshot")
+            out = StringIO()
+            call_command("build_ban_snapshot", path=path, stdout=out)
+
+            self.assertIn("version 1 with 1 bans", out.getvalue())
+
+            call_command("build_ban_snapshot", path=path, stdout=out)
+
+            self.assertIn("already up to date", out.getvalue())
+
+            call_command("build_ban_snapshot", path=path, full=True, stdout=out)
+
+            self.assertIn("version 2 with 1 bans", out.getvalue())
+
+    def test_archive_punishments(self):
+        """Test that only cold punishments are moved to the archive"""
+        punishments = [
+            Punishment.objects.create(
+                mc_username="SamieMarie",
+                reason="Being a noob",
+                punished_by="smiileyface",
+                expires=datetime.now() + timedelta(days=7),
+            )
+            for _ in range(3)
+        ]
+        Punishment.objects.filter(id=punishments[0].id).update(
+            is_active=False, last_updated=timezone.now() - timedelta(days=60)
+        )
+        Punishment.objects.filter(id=punishments[1].id).update(
+            expires=timezone.now() - timedelta(days=60)
+        )
+        out = StringIO()
+        call_command("archive_punishments", batch_size=1, stdout=out)
+
+        self.assertIn("Archived 2 punishments", out.getvalue())
+        self.assertEqual(
+            list(Punishment.objects.values_list("id", flat=True)),
+            [punishments[2].id],
+        )
+        archived = PunishmentArchive.objects.get(id=punishments[0].id)
+        self.assertFalse(archived.is_active)
+        self.assertEqual(archived.date_punished, punishments[0].date_punished)
+        self.assertEqual(PunishmentTombstone.objects.count(), 2)
+
+    def test_archive_batch(self):
+        """Test that a batch is archived with bulk queries and tombstones last"""
+        expires = timezone.now() - timedelta(days=60)
+        punishments = [
+            Punishment.objects.create(
+                mc_username="SamieMarie",
+                reason="Being a noob",
+                punished_by="smiileyface",
+                expires=expires,
+            )
+            for _ in range(3)
+        ]
+        UUIDResolutionJob.objects.create(punishment=punishments[0])
+        cutoff = timezone.now() - timedelta(days=30)
+        with self.assertNumQueries(9):
+            moved = archive.archive_batch(cutoff, 100)
+
+        self.assertEqual(moved, 3)
+        self.assertFalse(Punishment.objects.exists())
+        self.assertFalse(UUIDResolutionJob.objects.exists())
+        self.assertEqual(
+            PunishmentExpiryStats.objects.get(day=timezone.localdate(expires)).active,
+            0,
+        )
+        archived_at = PunishmentArchive.objects.values_list("archived_at", flat=True)
+        tombstones = PunishmentTombstone.objects.order_by("punishment_id")
+        self.assertEqual(
+            [tombstone.punishment_id for tombstone in tombstones],
+            [punishment.id for punishment in punishments],
+        )
+        for tombstone in tombstones:
+            self.assertGreater(tombstone.deleted_at, max(archived_at))
+
+    def test_rebuild_punishment_stats(self):
+        """Test rebuilding the punishment statistics tables"""
+        Punishment.objects.create(
+            mc_username="SamieMarie",
+            reason="Being a noob",
+            punished_by="smiileyface",
+            expires=datetime.now() + timedelta(days=7),
+        )
+        PunishmentDailyStats.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_punishment_stats", stdout=out)
+
+        self.assertIn("Rebuilt 1 daily and 1 expiry rows", out.getvalue())
+        self.assertEqual(PunishmentDailyStats.objects.get().created, 1)
+
+    def test_resolve_uuids(self):
+        """Test that queued lookups are processed until none are due"""
+        with MojangStubServer(generate=True) as stub, override_settings(
+            MOJANG_API_URL=stub.url
+        ):
+            punishment = Punishment.objects.create_pending(
+                mc_username="SamieMarie",
+                reason="Being a noob",
+                punished_by="smiileyface",
+                expires=datetime.now() + timedelta(days=7),
+            )
+            out = StringIO()
+            call_command("resolve_uuids", once=True, stdout=out)
+
+        self.assertIn("Processed 1 jobs", out.getvalue())
+        punishment.refresh_from_db()
+        self.assertEqual(punishment.mc_uuid.hex, stub.lookup("SamieMarie"))
+
+    def test_resolve_uuids_error(self):
+        """Test that an error resolving a batch is logged instead of raised"""
+        out = StringIO()
+        with patch.object(resolution, "resolve_batch", side_effect=RuntimeError):
+            with self.assertLogs(
+                "ezpunishments.punishment.management.commands.resolve_uuids"
+            ):
+                call_command("resolve_uuids", once=True, stdout=out)
+
+        self.assertIn("Processed 0 jobs", out.getvalue())
+
+
+class BenchmarkApiCommandTests(TransactionTestCase):
+    def test_benchmark_api(self):
+        """Test that the load test reports every endpoint and leaves no data"""
+        out = StringIO()
+        call_command(
+            "benchmark_api",
+            users=2,
+            punishments=20,
+            requests=40,
+            concurrency=2,
+            seed=1,
+            stdout=out,
+        )
+
+        results = json.loads(out.getvalue())
+        total = results["endpoints"]["total"]
+        self.assertEqual(total["requests"], 40)
+        self.assertEqual(total["errors"], 0)
+        self.assertLessEqual(total["p50_ms"], total["p99_ms"])
+        self.assertGreater(results["endpoints"]["list"]["queries_per_request"], 0)
+        for model in (
+            Punishment,
+            PunishmentDailyStats,
+            PunishmentExpiryStats,
+            PunishmentTombstone,
+            MinecraftProfile,
+            Token,
+            get_user_model(),
+        ):
+            self.assertFalse(model.objects.exists(), model.__name__)
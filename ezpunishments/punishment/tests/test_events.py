@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+
+from ezpunishments.core.tests.utils import MojangStubMixin
+from ezpunishments.punishment import events
+from ezpunishments.punishment.streams import EventStreamRouter
+from ezpunishments.punishment.tests.utils import sample_punishment
+from ezpunishments.user import service_tokens
+
+
+EVENTS_PATH = "/api/punishment/events/"
+
+
+def parse_frame(frame):
+    """Returns the event type and data of a Server-Sent Events frame"""
+    lines = dict(line.split(": ", 1) for line in frame.decode().split("\n") if line)
+    return lines["event"], json.loads(lines["data"])
+
+
+class InMemoryBrokerTests(SimpleTestCase):
+    """Test fanning events out to subscribers"""
+
+    async def test_publish_from_another_thread(self):
+        """Test that frames published from any thread reach every subscriber"""
+        broker = events.InMemoryBroker()
+        subscriptions = [broker.subscribe(), broker.subscribe()]
+
+        thread = threading.Thread(target=broker.publish, args=(b"frame",))
+        thread.start()
+        thread.join()
+
+        for subscription in subscriptions:
+            frame = await asyncio.wait_for(subscription.get(), 1)
+            self.assertEqual(frame, b"frame")
+
+    async def test_slow_subscriber_closed(self):
+        """Test that a subscriber too far behind is dropped"""
+        broker = events.InMemoryBroker()
+        subscription = broker.subscribe(maxsize=2)
+
+        for _ in range(3):
+            broker.publish(b"frame")
+        await asyncio.sleep(0)
+
+        self.assertIsNone(await subscription.get())
+        self.assertNotIn(subscription, broker.subscribers)
+
+
+class PunishmentEventSignalTests(MojangStubMixin, TransactionTestCase):
+    """Test that punishment changes are published once committed"""
+
+    def setUp(self):
+        super().setUp()
+        self.published = []
+        events.get_broker().publish = self.published.append
+
+    def tearDown(self):
+        del events.get_broker().publish
+
+    def test_events_published(self):
+        """Test that create, update, revoke and delete events are published"""
+        punishment = sample_punishment()
+        punishment.reason = "Changed"
+        punishment.save()
+        punishment.is_active = False
+        punishment.save()
+        punishment_id = punishment.id
+        punishment.delete()
+
+        published = [parse_frame(frame) for frame in self.published]
+
+        self.assertEqual(
+            [event_type for event_type, _ in published],
+            ["created", "updated", "revoked", "deleted"],
+        )
+        self.assertEqual(published[0][1]["id"], punishment_id)
+        self.assertEqual(published[1][1]["reason"], "Changed")
+
+    def test_rolled_back_changes_not_published(self):
+        """Test that nothing is published for a rolled back transaction"""
+        try:
+            with transaction.atomic():
+                sample_punishment()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(self.published, [])
+
+
+class EventStreamTests(MojangStubMixin, TestCase):
+    """Test the Server-Sent Events stream"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.application = EventStreamRouter(None)
+
+    def communicator(self, authorization=None):
+        headers = []
+        if authorization:
+            headers.append((b"authorization", authorization.encode()))
+        return ApplicationCommunicator(
+            self.application,
+            {
+                "type": "http",
+                "method": "GET",
+                "path": EVENTS_PATH,
+                "headers": headers,
+            },
+        )
+
+    async def test_auth_required(self):
+        """Test that the stream needs a valid token"""
+        for authorization in (None, "Token invalid"):
+            communicator = self.communicator(authorization)
+            await communicator.send_input({"type": "http.request"})
+
+            start = await communicator.receive_output(1)
+
+            self.assertEqual(start["status"], 401)
+
+    async def test_service_token_scope_required(self):
+        """Test that service tokens need the punishment read scope"""
+        token = service_tokens.issue(self.user, ["punishments:write"])
+        communicator = self.communicator(f"Bearer {token}")
+        await communicator.send_input({"type": "http.request"})
+
+        start = await communicator.receive_output(1)
+
+        self.assertEqual(start["status"], 403)
+
+    async def test_stream_events(self):
+        """Test that published events are streamed until the client leaves"""
+        communicator = self.communicator(f"Token {self.token.key}")
+        await communicator.send_input({"type": "http.request"})
+
+        start = await communicator.receive_output(1)
+        connected = await communicator.receive_output(1)
+
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+        self.assertEqual(connected["body"], b": connected\n\n")
+
+        frame = events.format_event("created", {"id": 1})
+        events.get_broker().publish(frame)
+        message = await communicator.receive_output(1)
+
+        self.assertEqual(message["body"], frame)
+        self.assertTrue(message["more_body"])
+
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(1)
+
+        self.assertEqual(events.get_broker().subscribers, set())
@@ -1,43 +1,50 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from ezpunishments.core.models import Punishment
+from ezpunishments.core.tests.utils import MojangStubMixin
+from ezpunishments.punishment.archive import archive_batch
 from ezpunishments.punishment.serializers import PunishmentSerializer
+from ezpunishments.punishment.tests.utils import sample_punishment
 
+import csv
+import json
+import uuid
 from datetime import datetime
 from datetime import timedelta
 from django.utils.timezone import make_aware
 
 
 PUNISHMENT_URL = reverse("punishment:punishment-list")
+BULK_URL = reverse("punishment:punishment-bulk")
+CHECK_MANY_URL = reverse("punishment:punishment-check-many")
+CHANGES_URL = reverse("punishment:punishment-changes")
 
 
 def detail_url(punishment_id):
     return reverse("punishment:punishment-detail", args=[punishment_id])
 
 
-def sample_punishment(**params):
-    """Create and return a sample punishment"""
-    defaults = {
-        "mc_username": "SamieMarie",
-        "reason": "Being a noob",
-        "proof": "https://someproofhere.com/proof",
-        "punished_by": "smiileyface",
-        "expires": datetime.now() + timedelta(days=7),
-    }
-    defaults.update(params)
+def export_url(export_format):
+    return reverse("punishment:punishment-export", args=[export_format])
 
-    return Punishment.objects.create(**defaults)
 
+def check_url(mc_uuid):
+    return reverse("punishment:punishment-check", args=[mc_uuid])
 
-class PublicPunishmentApiTests(TestCase):
+
+class PublicPunishmentApiTests(MojangStubMixin, TestCase):
     """Test the publically available punishment API endpoints"""
 
     def setUp(self):
+        super().setUp()
         self.client = APIClient()
 
     def test_auth_required(self):
@@ -47,16 +54,18 @@ class PublicPunishmentApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivatePunishmentApiTests(TestCase):
+class PrivatePunishmentApiTests(MojangStubMixin, TestCase):
     """Test punishment API enpoints that require authentication"""
 
     def setUp(self):
+        super().setUp()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             username="smiileyface", password="Testpass123"
         )
         self.user.is_staff = True
         self.client.force_authenticate(self.user)
+        cache.clear()
 
     def test_create_punishment(self):
         """Test creating a punishment"""
@@ -95,7 +104,196 @@ class PrivatePunishmentApiTests(TestCase):
         res = self.client.get(PUNISHMENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_retrieve_punishments_paginated(self):
+        """Test that punishments are paged newest first without counting"""
+        punishments = [sample_punishment() for _ in range(3)]
+
+        # Two queries for the ETag and one for the page
+        with self.assertNumQueries(3):
+            res = self.client.get(PUNISHMENT_URL, {"page_size": 2})
+
+        self.assertNotIn("count", res.data)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [punishments[2].id, punishments[1].id],
+        )
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [punishments[0].id]
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_list_not_modified(self):
+        """Test that an unchanged punishment list returns 304 with two queries"""
+        punishment = sample_punishment()
+        res = self.client.get(PUNISHMENT_URL)
+
+        self.assertNotIn("Last-Modified", res)
+        with self.assertNumQueries(2):
+            res = self.client.get(PUNISHMENT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+        punishment.reason = "Changed"
+        punishment.save()
+        res = self.client.get(PUNISHMENT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["reason"], "Changed")
+
+    def test_list_etag_changes_on_delete(self):
+        """Test that deleting a punishment changes the list ETag"""
+        punishment = sample_punishment()
+        sample_punishment()
+        etag = self.client.get(PUNISHMENT_URL)["ETag"]
+
+        punishment.delete()
+        res = self.client.get(PUNISHMENT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_list_etag_changes_on_late_commit(self):
+        """Test that a row saved before the newest one still changes the ETag"""
+        newest = sample_punishment()
+        etag = self.client.get(PUNISHMENT_URL)["ETag"]
+
+        # As if it had been saved before newest but committed after the ETag
+        late = sample_punishment()
+        Punishment.objects.filter(pk=late.pk).update(
+            last_updated=newest.last_updated - timedelta(seconds=1)
+        )
+        res = self.client.get(PUNISHMENT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_list_etag_depends_on_query(self):
+        """Test that differently filtered lists get different ETags"""
+        sample_punishment()
+        etag = self.client.get(PUNISHMENT_URL)["ETag"]
+
+        res = self.client.get(
+            PUNISHMENT_URL, {"mc_username": "Notch"}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_not_modified(self):
+        """Test that an unchanged punishment returns 304"""
+        punishment = sample_punishment()
+        etag = self.client.get(detail_url(punishment.id))["ETag"]
+
+        res = self.client.get(detail_url(punishment.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(detail_url(punishment.id), {"is_active": False})
+        res = self.client.get(detail_url(punishment.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data["is_active"])
+
+    def archive(self, *punishments):
+        """Revoke and archive the given punishments"""
+        for punishment in punishments:
+            punishment.is_active = False
+            punishment.save()
+        archive_batch(make_aware(datetime.now() + timedelta(minutes=1)), 100)
+
+    def test_list_with_history(self):
+        """Test that archived punishments are only listed when asked for"""
+        punishments = [sample_punishment() for _ in range(4)]
+        self.archive(punishments[0], punishments[2])
+
+        res = self.client.get(PUNISHMENT_URL)
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [punishments[3].id, punishments[1].id],
+        )
+
+        res = self.client.get(PUNISHMENT_URL, {"history": "true", "page_size": 3})
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [punishments[3].id, punishments[2].id, punishments[1].id],
+        )
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [punishments[0].id]
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_retrieve_with_history(self):
+        """Test that archived punishments can be retrieved with history"""
+        punishment = sample_punishment()
+        self.archive(punishment)
+
+        res = self.client.get(detail_url(punishment.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(detail_url(punishment.id), {"history": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data["is_active"])
+
+    def test_invalid_history(self):
+        """Test that history must be a boolean"""
+        res = self.client.get(PUNISHMENT_URL, {"history": "maybe"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fields_list(self):
+        """Test that fields limits the listed fields and selected columns"""
+        punishments = [sample_punishment() for _ in range(3)]
+        fields = "mc_uuid,reason,expires"
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PUNISHMENT_URL, {"fields": fields, "page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("proof", queries[0]["sql"])
+        expected = PunishmentSerializer(punishments[2]).data
+        self.assertEqual(
+            res.data["results"][0],
+            {field: expected[field] for field in fields.split(",")},
+        )
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [item["mc_uuid"] for item in res.data["results"]],
+            [punishments[0].mc_uuid],
+        )
+
+    def test_sparse_fields_retrieve(self):
+        """Test that fields limits the fields of a single punishment"""
+        punishment = sample_punishment()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                detail_url(punishment.id), {"fields": ["mc_uuid", "expires"]}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("proof", queries[0]["sql"])
+        self.assertEqual(set(res.data), {"mc_uuid", "expires"})
+
+    def test_sparse_fields_unknown(self):
+        """Test that asking for unknown fields fails"""
+        res = self.client.get(PUNISHMENT_URL, {"fields": "mc_uuid,password"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
 
     def test_filter_punishments_by_username(self):
         """Test returning punishments of specified users"""
@@ -112,9 +310,9 @@ class PrivatePunishmentApiTests(TestCase):
         serializer2 = PunishmentSerializer(punishment2)
         serializer3 = PunishmentSerializer(punishment3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_punishments_by_punisher(self):
         """Test returning punishments of specified punishers"""
@@ -131,6 +329,430 @@ class PrivatePunishmentApiTests(TestCase):
         serializer2 = PunishmentSerializer(punishment2)
         serializer3 = PunishmentSerializer(punishment3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data["results"])
+        self.assertIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
+
+    def test_filter_punishments_repeated_params(self):
+        """Test that filters accept repeated query parameters"""
+        punishment1 = sample_punishment()
+        punishment2 = sample_punishment(mc_username="Notch")
+        sample_punishment(mc_username="RiseNinja")
+
+        res = self.client.get(PUNISHMENT_URL, {"mc_username": ["SamieMarie", "Notch"]})
+
+        self.assertEqual(
+            {item["id"] for item in res.data["results"]},
+            {punishment1.id, punishment2.id},
+        )
+
+    def test_filter_punishments_by_uuid(self):
+        """Test filtering punishments by dashed or undashed MC UUID"""
+        punishment1 = sample_punishment()
+        punishment2 = sample_punishment(mc_username="Notch")
+        sample_punishment(mc_username="RiseNinja")
+
+        res = self.client.get(
+            PUNISHMENT_URL,
+            {
+                "mc_uuid": [
+                    punishment1.mc_uuid,
+                    str(uuid.UUID(punishment2.mc_uuid)),
+                ]
+            },
+        )
+
+        self.assertEqual(
+            {item["id"] for item in res.data["results"]},
+            {punishment1.id, punishment2.id},
+        )
+
+    def test_mc_uuids_returned_undashed(self):
+        """Test that MC UUIDs stored as UUIDs are returned undashed"""
+        punishment = sample_punishment()
+
+        list_res = self.client.get(PUNISHMENT_URL)
+        detail_res = self.client.get(detail_url(punishment.id))
+
+        for item in (list_res.data["results"][0], detail_res.data):
+            self.assertEqual(item["mc_uuid"], "c5cb9e1c4cbe4563bc55754d59b55a1e")
+            self.assertEqual(
+                item["punished_by_uuid"], "c6edbd5a24aa440d918a1e299b22e5f9"
+            )
+
+    def test_filter_punishments_by_active_and_expiry(self):
+        """Test filtering punishments by active state and expiry range"""
+        now = datetime.now()
+        punishment1 = sample_punishment(expires=now + timedelta(days=1))
+        sample_punishment(expires=now + timedelta(days=10))
+        sample_punishment(expires=now + timedelta(days=1), is_active=False)
+
+        res = self.client.get(
+            PUNISHMENT_URL,
+            {
+                "is_active": "true",
+                "expires_after": now.isoformat(),
+                "expires_before": (now + timedelta(days=2)).isoformat(),
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in res.data["results"]], [punishment1.id])
+
+    def test_order_punishments(self):
+        """Test ordering punishments by expiry"""
+        now = datetime.now()
+        punishment1 = sample_punishment(expires=now + timedelta(days=3))
+        punishment2 = sample_punishment(expires=now + timedelta(days=1))
+        punishment3 = sample_punishment(expires=now + timedelta(days=2))
+
+        res = self.client.get(PUNISHMENT_URL, {"ordering": "expires"})
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [punishment2.id, punishment3.id, punishment1.id],
+        )
+
+    def test_invalid_filters(self):
+        """Test that invalid filter values are rejected"""
+        for params in (
+            {"ordering": "reason"},
+            {"is_active": "maybe"},
+            {"expires_after": "tomorrow"},
+            {"mc_uuid": "abc"},
+        ):
+            res = self.client.get(PUNISHMENT_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_punishments(self):
+        """Test creating many punishments in one request"""
+        expires = make_aware(datetime.now() + timedelta(days=7))
+        payload = [
+            {
+                "mc_username": mc_username,
+                "reason": "Ban wave",
+                "punished_by": "smiileyface",
+                "expires": expires,
+            }
+            for mc_username in ("SamieMarie", "Notch", "RiseNinja")
+        ]
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(Punishment.objects.count(), 3)
+        for item, result in zip(payload, res.data):
+            self.assertEqual(result["status"], 201)
+            punishment = Punishment.objects.get(id=result["data"]["id"])
+            self.assertEqual(punishment.mc_username, item["mc_username"])
+            self.assertEqual(punishment.expires, expires)
+            self.assertTrue(punishment.mc_uuid)
+
+    def test_bulk_create_partial_failure(self):
+        """Test that invalid items are reported without failing the rest"""
+        expires = make_aware(datetime.now() + timedelta(days=7))
+        payload = [
+            {
+                "mc_username": "SamieMarie",
+                "reason": "Ban wave",
+                "punished_by": "smiileyface",
+                "expires": expires,
+            },
+            {"mc_username": "Notch", "punished_by": "smiileyface"},
+            {
+                "mc_username": ">invalid<",
+                "reason": "Ban wave",
+                "punished_by": "smiileyface",
+                "expires": expires,
+            },
+        ]
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([result["status"] for result in res.data], [201, 400, 400])
+        self.assertIn("reason", res.data[1]["errors"])
+        self.assertIn("mc_username", res.data[2]["errors"])
+        self.assertEqual(Punishment.objects.count(), 1)
+
+    def test_bulk_create_requires_list(self):
+        """Test that the bulk endpoint rejects a single object"""
+        res = self.client.post(BULK_URL, {"mc_username": "Notch"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PUNISHMENT_BULK_MAX=1)
+    def test_bulk_create_limit(self):
+        """Test that the bulk endpoint enforces its maximum size"""
+        res = self.client.post(BULK_URL, [{}, {}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Punishment.objects.exists())
+
+    def test_check_punished(self):
+        """Test checking a player with an active punishment"""
+        punishment = sample_punishment()
+
+        res = self.client.get(check_url(punishment.mc_uuid))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["punished"])
+        self.assertEqual(res.data["punishment"]["id"], punishment.id)
+        self.assertEqual(res.data["punishment"]["reason"], punishment.reason)
+
+    def test_check_ignores_inactive_and_expired(self):
+        """Test that removed and expired punishments aren't effective"""
+        punishment = sample_punishment(is_active=False)
+        sample_punishment(expires=datetime.now() - timedelta(days=1))
+
+        res = self.client.get(check_url(punishment.mc_uuid))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data["punished"])
+        self.assertIsNone(res.data["punishment"])
+
+    def test_check_accepts_dashed_uuid(self):
+        """Test that dashed MC UUIDs are normalized"""
+        punishment = sample_punishment()
+        mc_uuid = str(uuid.UUID(punishment.mc_uuid))
+
+        res = self.client.get(check_url(mc_uuid))
+
+        self.assertTrue(res.data["punished"])
+        self.assertEqual(res.data["mc_uuid"], punishment.mc_uuid)
+
+    def test_check_is_cached(self):
+        """Test that repeated checks are served from the cache"""
+        punishment = sample_punishment()
+        self.client.get(check_url(punishment.mc_uuid))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(check_url(punishment.mc_uuid))
+
+        self.assertTrue(res.data["punished"])
+
+    def test_check_invalidated_on_update(self):
+        """Test that removing a punishment is reflected straight away"""
+        punishment = sample_punishment()
+        self.client.get(check_url(punishment.mc_uuid))
+
+        self.client.patch(
+            detail_url(punishment.id), {"is_active": False, "removed_by": "Notch"}
+        )
+        res = self.client.get(check_url(punishment.mc_uuid))
+
+        self.assertFalse(res.data["punished"])
+
+    def test_check_invalidated_on_create(self):
+        """Test that a new punishment replaces a cached miss"""
+        mc_uuid = "c5cb9e1c4cbe4563bc55754d59b55a1e"
+        self.client.get(check_url(mc_uuid))
+
+        sample_punishment()
+        res = self.client.get(check_url(mc_uuid))
+
+        self.assertTrue(res.data["punished"])
+
+    def test_check_invalid_uuid(self):
+        """Test that malformed MC UUIDs are rejected"""
+        res = self.client.get(check_url("abc"))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_many(self):
+        """Test checking many players at once with a single query"""
+        punishment1 = sample_punishment()
+        punishment2 = sample_punishment(mc_username="Notch")
+        sample_punishment(mc_username="RiseNinja", is_active=False)
+        mc_uuids = [
+            punishment1.mc_uuid,
+            str(uuid.UUID(punishment2.mc_uuid)),
+            "c6edbd5a24aa440d918a1e299b22e5f9",
+        ]
+
+        with self.assertNumQueries(1):
+            res = self.client.post(
+                CHECK_MANY_URL, {"mc_uuids": mc_uuids}, format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data["punished"]), {punishment1.mc_uuid, punishment2.mc_uuid}
+        )
+        self.assertEqual(
+            res.data["punished"][punishment2.mc_uuid]["id"], punishment2.id
+        )
+
+        with self.assertNumQueries(0):
+            res = self.client.post(
+                CHECK_MANY_URL, {"mc_uuids": mc_uuids}, format="json"
+            )
+
+        self.assertEqual(len(res.data["punished"]), 2)
+
+    def test_check_many_longest_punishment_wins(self):
+        """Test that the punishment expiring last is returned"""
+        sample_punishment(expires=datetime.now() + timedelta(days=1))
+        punishment = sample_punishment(expires=datetime.now() + timedelta(days=30))
+
+        res = self.client.post(
+            CHECK_MANY_URL, {"mc_uuids": [punishment.mc_uuid]}, format="json"
+        )
+
+        self.assertEqual(res.data["punished"][punishment.mc_uuid]["id"], punishment.id)
+
+    def test_check_many_invalid_uuid(self):
+        """Test that a malformed MC UUID fails the whole batch"""
+        res = self.client.post(CHECK_MANY_URL, {"mc_uuids": ["abc"]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PUNISHMENT_CHECK_BATCH_MAX=1)
+    def test_check_many_limit(self):
+        """Test that the batch check endpoint enforces its maximum size"""
+        mc_uuids = ["c6edbd5a24aa440d918a1e299b22e5f9"] * 2
+        res = self.client.post(CHECK_MANY_URL, {"mc_uuids": mc_uuids}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PUNISHMENT_CHANGES_LAG=0)
+    def test_changes_since_cursor(self):
+        """Test that the changes feed only returns what changed since the cursor"""
+        punishment1 = sample_punishment()
+        punishment2 = sample_punishment(mc_username="Notch")
+        sample_punishment()
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["changed"]), 3)
+        self.assertEqual(res.data["deleted"], [])
+        self.assertFalse(res.data["more"])
+
+        punishment1.is_active = False
+        punishment1.save()
+        deleted_id = punishment2.id
+        punishment2.delete()
+        res = self.client.get(CHANGES_URL, {"since": res.data["cursor"]})
+
+        self.assertEqual(res.data["changed"], [PunishmentSerializer(punishment1).data])
+        self.assertEqual(
+            res.data["deleted"],
+            [{"id": deleted_id, "mc_uuid": punishment2.mc_uuid}],
+        )
+
+        res = self.client.get(CHANGES_URL, {"since": res.data["cursor"]})
+
+        self.assertEqual(res.data["changed"], [])
+        self.assertEqual(res.data["deleted"], [])
+
+    @override_settings(PUNISHMENT_CHANGES_LAG=0, PUNISHMENT_CHANGES_PAGE_SIZE=2)
+    def test_changes_paged(self):
+        """Test that the changes feed is paged in last updated order"""
+        punishments = [sample_punishment() for _ in range(3)]
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertTrue(res.data["more"])
+        self.assertEqual(
+            [item["id"] for item in res.data["changed"]],
+            [punishments[0].id, punishments[1].id],
+        )
+
+        res = self.client.get(CHANGES_URL, {"since": res.data["cursor"]})
+
+        self.assertFalse(res.data["more"])
+        self.assertEqual(
+            [item["id"] for item in res.data["changed"]], [punishments[2].id]
+        )
+
+    def test_changes_lag(self):
+        """Test that the changes feed stays behind the newest writes"""
+        sample_punishment()
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.data["changed"], [])
+
+    def test_changes_invalid_cursor(self):
+        """Test that an invalid cursor fails"""
+        res = self.client.get(CHANGES_URL, {"since": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_ndjson(self):
+        """Test streaming punishments as newline delimited JSON"""
+        punishment1 = sample_punishment()
+        punishment2 = sample_punishment(mc_username="Notch", proof=None)
+
+        res = self.client.get(export_url("ndjson"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                PunishmentSerializer(punishment1).data,
+                PunishmentSerializer(punishment2).data,
+            ],
+        )
+
+    def test_export_csv(self):
+        """Test streaming punishments as CSV"""
+        punishment = sample_punishment()
+
+        res = self.client.get(export_url("csv"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(punishment.id))
+        self.assertEqual(rows[0]["mc_uuid"], punishment.mc_uuid)
+        self.assertEqual(
+            rows[0]["expires"], PunishmentSerializer(punishment).data["expires"]
+        )
+
+    def test_export_sparse_fields(self):
+        """Test exporting only the requested fields"""
+        punishment = sample_punishment()
+
+        res = self.client.get(export_url("csv"), {"fields": "mc_uuid,expires"})
+
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(list(rows[0]), ["mc_uuid", "expires"])
+        self.assertEqual(rows[0]["mc_uuid"], punishment.mc_uuid)
+
+
+class MojangOutagePunishmentApiTests(MojangStubMixin, TestCase):
+    """Test creating punishments while Mojang is unavailable"""
+
+    mojang_status_code = 503
+    mojang_settings = {"MOJANG_BREAKER_THRESHOLD": 1}
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create(
+            username="smiileyface", mc_uuid=self.stub.lookup("smiileyface")
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_create_punishment_unavailable(self):
+        """Test that creating a punishment fails fast with a 503"""
+        payload = {
+            "mc_username": "SamieMarie",
+            "reason": "Being a noob",
+            "punished_by": "smiileyface",
+            "expires": datetime.now() + timedelta(days=7),
+        }
+
+        for _ in range(2):
+            res = self.client.post(PUNISHMENT_URL, payload)
+
+            self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertFalse(Punishment.objects.exists())
@@ -0,0 +1,206 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ezpunishments.core.models import (
+    MinecraftProfile,
+    Punishment,
+    PunishmentDailyStats,
+    UUIDResolutionJob,
+)
+from ezpunishments.core.tests.utils import MojangStubMixin
+from ezpunishments.punishment import resolution
+
+
+PUNISHMENTS_URL = reverse("punishment:punishment-list")
+
+
+def pending_punishment(**params):
+    """Create and return a punishment waiting on UUID resolution"""
+    defaults = {
+        "mc_username": "SamieMarie",
+        "reason": "Being a noob",
+        "punished_by": "smiileyface",
+        "expires": timezone.now() + timedelta(days=7),
+    }
+    defaults.update(params)
+
+    return Punishment.objects.create_pending(**defaults)
+
+
+class UUIDResolutionTests(MojangStubMixin, TestCase):
+    """Test creating punishments before their UUIDs are known"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create(
+            username="smiileyface", mc_uuid=self.stub.lookup("smiileyface")
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_async_create_during_outage(self):
+        """Test that a punishment is accepted while Mojang is down"""
+        self.stub.status_code = 503
+        payload = {
+            "mc_username": "SamieMarie",
+            "reason": "Being a noob",
+            "punished_by": "smiileyface",
+            "expires": timezone.now() + timedelta(days=7),
+        }
+
+        res = self.client.post(PUNISHMENTS_URL, payload, HTTP_PREFER="respond-async")
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["status"], UUIDResolutionJob.PENDING)
+        self.assertIsNone(res.data["punishment"]["mc_uuid"])
+        self.assertEqual(self.stub.requests, [])
+        status_url = res["Location"]
+
+        self.stub.status_code = None
+        self.assertEqual(resolution.resolve_batch(10), 1)
+        res = self.client.get(status_url)
+
+        self.assertEqual(res.data["status"], "resolved")
+        self.assertEqual(
+            res.data["punishment"]["mc_uuid"], self.stub.lookup("SamieMarie")
+        )
+        self.assertEqual(PunishmentDailyStats.objects.get().created, 1)
+
+    def test_revoked_before_resolution(self):
+        """Test that a punishment revoked while pending counts once resolved"""
+        punishment = pending_punishment()
+        punishment.is_active = False
+        punishment.save()
+
+        self.assertFalse(PunishmentDailyStats.objects.exists())
+        resolution.resolve_batch(10)
+
+        stats = PunishmentDailyStats.objects.get()
+        self.assertEqual((stats.created, stats.revoked), (1, 1))
+
+    def test_async_create_known_uuids(self):
+        """Test that UUIDs already known are used without queueing a job"""
+        for name in ("samiemarie", "smiileyface"):
+            MinecraftProfile.objects.create(
+                username=name,
+                mc_uuid=self.stub.lookup(name),
+                last_resolved=timezone.now() - timedelta(days=30),
+            )
+        payload = {
+            "mc_username": "SamieMarie",
+            "reason": "Being a noob",
+            "punished_by": "smiileyface",
+            "expires": timezone.now() + timedelta(days=7),
+        }
+
+        res = self.client.post(PUNISHMENTS_URL, payload, HTTP_PREFER="respond-async")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["mc_uuid"], self.stub.lookup("SamieMarie"))
+        self.assertFalse(UUIDResolutionJob.objects.exists())
+        self.assertEqual(self.stub.requests, [])
+
+    def test_retry_while_unavailable(self):
+        """Test that lookups are retried later and given up on eventually"""
+        punishment = pending_punishment()
+        self.stub.status_code = 503
+
+        with override_settings(PUNISHMENT_RESOLVE_MAX_ATTEMPTS=2):
+            resolution.resolve_batch(10)
+            job = UUIDResolutionJob.objects.get()
+
+            self.assertEqual(job.status, UUIDResolutionJob.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertEqual(resolution.resolve_batch(10), 0)
+
+            job.run_after = timezone.now()
+            job.save()
+            resolution.resolve_batch(10)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UUIDResolutionJob.FAILED)
+        punishment.refresh_from_db()
+        self.assertIsNone(punishment.mc_uuid)
+
+    def test_unknown_username(self):
+        """Test that a username Mojang doesn't know fails without retrying"""
+        punishment = pending_punishment(mc_username="no such name")
+
+        resolution.resolve_batch(10)
+
+        job = UUIDResolutionJob.objects.get()
+        self.assertEqual(job.status, UUIDResolutionJob.FAILED)
+        self.assertIn("no such name", job.last_error)
+        punishment.refresh_from_db()
+        self.assertIsNone(punishment.mc_uuid)
+        self.assertEqual(
+            punishment.punished_by_uuid.hex, self.stub.lookup("smiileyface")
+        )
+
+    def test_broken_job(self):
+        """Test that an error backfilling one job doesn't stop the others"""
+        broken = pending_punishment()
+        punishment = pending_punishment(mc_username="Notch")
+        backfill = resolution.backfill
+
+        def break_one(target, mc_uuids):
+            if target.pk == broken.pk:
+                raise RuntimeError("Broken row")
+            return backfill(target, mc_uuids)
+
+        with patch.object(resolution, "backfill", side_effect=break_one):
+            with self.assertLogs(resolution.logger, "ERROR"):
+                self.assertEqual(resolution.resolve_batch(10), 2)
+
+        job = UUIDResolutionJob.objects.get()
+        self.assertEqual(job.punishment, broken)
+        self.assertEqual(job.status, UUIDResolutionJob.PENDING)
+        self.assertEqual(job.last_error, "RuntimeError: Broken row")
+        punishment.refresh_from_db()
+        self.assertEqual(punishment.mc_uuid.hex, self.stub.lookup("Notch"))
+
+    def test_lookup_outside_transaction(self):
+        """Test that Mojang is called with the jobs leased but not locked"""
+        punishment = pending_punishment()
+        depth = len(connection.savepoint_ids)
+        get_mc_uuids = resolution.get_mc_uuids
+        seen = {}
+
+        def lookup(usernames):
+            seen["depth"] = len(connection.savepoint_ids)
+            seen["due"] = resolution.due_jobs().exists()
+            return get_mc_uuids(usernames)
+
+        with patch.object(resolution, "get_mc_uuids", side_effect=lookup):
+            resolution.resolve_batch(10)
+
+        self.assertEqual(seen, {"depth": depth, "due": False})
+        self.assertFalse(UUIDResolutionJob.objects.exists())
+        punishment.refresh_from_db()
+        self.assertEqual(punishment.mc_uuid.hex, self.stub.lookup("SamieMarie"))
+
+    def test_expired_lease(self):
+        """Test that jobs taken over by another worker aren't backfilled twice"""
+        pending_punishment()
+        get_mc_uuids = resolution.get_mc_uuids
+
+        def lookup(usernames):
+            # Another worker claims the job once this lease has run out
+            UUIDResolutionJob.objects.update(run_after=timezone.now())
+            return get_mc_uuids(usernames)
+
+        with patch.object(resolution, "get_mc_uuids", side_effect=lookup):
+            resolution.resolve_batch(10)
+
+        job = UUIDResolutionJob.objects.get()
+        self.assertEqual(job.attempts, 0)
+        self.assertIsNone(job.punishment.mc_uuid)
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ezpunishments.core.models import Punishment
+from ezpunishments.core.tests.utils import MojangStubMixin
+from ezpunishments.punishment import search
+from ezpunishments.punishment.tests.utils import sample_punishment
+
+
+SEARCH_URL = reverse("punishment:punishment-search-punishments")
+
+
+class PunishmentSearchTests(MojangStubMixin, TestCase):
+    """Test searching punishment reasons and proof"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_search_ranked(self):
+        """Test that matches are returned best first and others left out"""
+        once = sample_punishment(reason="Hacking", proof="killaura clip")
+        twice = sample_punishment(reason="Killaura", proof="killaura, ticket T-1234")
+        sample_punishment(reason="Spamming chat")
+
+        res = self.client.get(SEARCH_URL, {"q": "killaura"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["id"] for row in res.data["results"]], [twice.id, once.id]
+        )
+
+        res = self.client.get(SEARCH_URL, {"q": "T-1234", "fields": "id"})
+
+        self.assertEqual(res.data["results"], [{"id": twice.id}])
+
+    def test_search_proof_url(self):
+        """Test that ids and path segments inside proof URLs are matched"""
+        url = sample_punishment(
+            reason="Hacking", proof="https://tickets.example.com/T-1234?tab=logs"
+        )
+        sample_punishment(reason="Hacking", proof="https://tickets.example.com/T-99")
+
+        res = self.client.get(SEARCH_URL, {"q": "T-1234", "fields": "id"})
+
+        self.assertEqual(res.data["results"], [{"id": url.id}])
+
+        res = self.client.get(SEARCH_URL, {"q": "tickets logs", "fields": "id"})
+
+        self.assertEqual(res.data["results"], [{"id": url.id}])
+
+    def test_search_filters_and_pages(self):
+        """Test that filters apply to results and pages link to the next one"""
+        for _ in range(3):
+            sample_punishment(reason="Using killaura")
+        sample_punishment(reason="Using killaura", is_active=False)
+
+        res = self.client.get(
+            SEARCH_URL, {"q": "killaura", "is_active": "true", "limit": 2}
+        )
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertIsNone(res.data["next"])
+
+    def test_search_requires_query(self):
+        """Test that searching without q is rejected"""
+        res = self.client.get(SEARCH_URL, {"q": " "})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_uses_index(self):
+        """Test that the search expression matches the GIN index"""
+        queryset = search.search(Punishment.objects.all(), "killaura").values("id")
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+
+        self.assertIn("punishment_search_idx", plan)
@@ -0,0 +1,170 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ezpunishments.core.models import Punishment
+from ezpunishments.core.tests.utils import MojangStubMixin, NOTCH_UUID, SAMIEMARIE_UUID
+from ezpunishments.punishment import snapshot
+from ezpunishments.punishment.tests.utils import sample_punishment
+
+
+SNAPSHOT_URL = reverse("punishment:punishment-ban-snapshot")
+
+
+@override_settings(PUNISHMENT_CHANGES_LAG=0)
+class BanSnapshotTests(MojangStubMixin, TestCase):
+    """Test building and reading ban snapshots"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "bans.snapshot")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_snapshot(self):
+        """Test that only active bans are written, longest first"""
+        sample_punishment()
+        longest = sample_punishment(expires=timezone.now() + timedelta(days=30))
+        sample_punishment(mc_username="Notch", is_active=False)
+        sample_punishment(mc_username="Notch", expires=timezone.now())
+
+        snapshot.build(self.path)
+
+        with snapshot.BanSnapshot(self.path) as bans:
+            self.assertEqual(bans.version, 1)
+            self.assertEqual(len(bans), 1)
+            self.assertTrue(bans.is_banned(SAMIEMARIE_UUID))
+            self.assertFalse(bans.is_banned(NOTCH_UUID))
+            self.assertEqual(
+                bans.expires(SAMIEMARIE_UUID),
+                longest.expires.replace(microsecond=0),
+            )
+            self.assertFalse(
+                bans.is_banned(SAMIEMARIE_UUID, now=longest.expires + timedelta(1))
+            )
+
+    def test_snapshot_sorted(self):
+        """Test that records are sorted so every UUID can be found"""
+        names = [f"player{i}" for i in range(20)]
+        for name in names:
+            sample_punishment(mc_username=name)
+
+        snapshot.build(self.path)
+
+        with snapshot.BanSnapshot(self.path) as bans:
+            keys = [key for key, _ in bans.records()]
+            self.assertEqual(keys, sorted(keys))
+            for punishment in Punishment.objects.all():
+                self.assertTrue(bans.is_banned(punishment.mc_uuid))
+
+    def test_refresh_applies_changes(self):
+        """Test that refreshing only applies what changed since the last build"""
+        punishment = sample_punishment()
+        snapshot.build(self.path)
+
+        punishment.is_active = False
+        punishment.save()
+        sample_punishment(mc_username="Notch")
+
+        self.assertTrue(snapshot.refresh(self.path))
+        with snapshot.BanSnapshot(self.path) as bans:
+            self.assertEqual(bans.version, 2)
+            self.assertFalse(bans.is_banned(SAMIEMARIE_UUID))
+            self.assertTrue(bans.is_banned(NOTCH_UUID))
+
+        self.assertFalse(snapshot.refresh(self.path))
+        with snapshot.BanSnapshot(self.path) as bans:
+            self.assertEqual(bans.version, 2)
+
+    def test_refresh_applies_deletes(self):
+        """Test that deleted punishments are dropped from the snapshot"""
+        punishment = sample_punishment()
+        snapshot.build(self.path)
+
+        punishment.delete()
+        snapshot.refresh(self.path)
+
+        with snapshot.BanSnapshot(self.path) as bans:
+            self.assertFalse(bans.is_banned(SAMIEMARIE_UUID))
+
+    def test_invalid_snapshot(self):
+        """Test that files that aren't snapshots are refused"""
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(b"not a snapshot at all, honestly")
+
+        with self.assertRaises(ValueError):
+            snapshot.BanSnapshot(self.path)
+
+
+class BanSnapshotApiTests(MojangStubMixin, TestCase):
+    """Test downloading the ban snapshot"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, "bans.snapshot")
+        self.settings = override_settings(PUNISHMENT_SNAPSHOT_PATH=path)
+        self.settings.enable()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def test_download_snapshot(self):
+        """Test that the built snapshot is served and can be cached"""
+        sample_punishment()
+        snapshot.build(settings.PUNISHMENT_SNAPSHOT_PATH)
+
+        res = self.client.get(SNAPSHOT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], snapshot.CONTENT_TYPE)
+        header = snapshot.read_header(io.BytesIO(b"".join(res.streaming_content)))
+        self.assertEqual(header["count"], 1)
+
+        res = self.client.get(SNAPSHOT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_not_built(self):
+        """Test that a missing snapshot is reported as unavailable"""
+        sample_punishment()
+
+        res = self.client.get(SNAPSHOT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(os.path.exists(settings.PUNISHMENT_SNAPSHOT_PATH))
+
+    def test_snapshot_corrupt(self):
+        """Test that a truncated snapshot is reported as unavailable and closed"""
+        with open(settings.PUNISHMENT_SNAPSHOT_PATH, "wb") as snapshot_file:
+            snapshot_file.write(b"EZB")
+        opened = []
+
+        def open_file(*args, **kwargs):
+            opened.append(open(*args, **kwargs))
+            return opened[-1]
+
+        with patch("ezpunishments.punishment.views.open", open_file, create=True):
+            res = self.client.get(SNAPSHOT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertTrue(opened[0].closed)
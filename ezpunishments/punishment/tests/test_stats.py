@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ezpunishments.core.models import PunishmentDailyStats, PunishmentExpiryStats
+from ezpunishments.core.tests.utils import MojangStubMixin, NOTCH_UUID, SMIILEYFACE_UUID
+from ezpunishments.punishment import stats
+from ezpunishments.punishment.tests.utils import sample_punishment
+
+
+STATS_URL = reverse("punishment:punishment-punishment-stats")
+
+
+def table(model, *fields):
+    return sorted(model.objects.values_list(*fields))
+
+
+class PunishmentStatsTests(MojangStubMixin, TestCase):
+    """Test keeping the punishment statistics up to date"""
+
+    def test_counts_follow_changes(self):
+        """Test that creating, revoking and deleting update the counters"""
+        first = sample_punishment()
+        second = sample_punishment(mc_username="Notch")
+        sample_punishment(mc_username="Notch", punished_by="Notch")
+
+        self.assertEqual(stats.active_count(), 3)
+
+        first.is_active = False
+        first.save()
+        second.expires = timezone.now() + timedelta(days=30)
+        second.save()
+        second.save()
+
+        self.assertEqual(stats.active_count(), 2)
+        today = timezone.localdate()
+        summary = stats.summary(today, today)
+        self.assertEqual(summary["daily"], [{"day": today, "created": 3, "revoked": 1}])
+        self.assertEqual(
+            summary["moderators"][0],
+            {
+                "punished_by_uuid": SMIILEYFACE_UUID,
+                "punished_by": "smiileyface",
+                "created": 2,
+                "revoked": 1,
+            },
+        )
+
+        second.delete()
+
+        self.assertEqual(stats.active_count(), 1)
+
+    def test_rebuild_matches_incremental(self):
+        """Test that rebuilding gives the same tables as the signals did"""
+        punishment = sample_punishment()
+        sample_punishment(mc_username="Notch", expires=timezone.now() + timedelta(1))
+        sample_punishment(mc_username="Notch", punished_by="Notch")
+        punishment.is_active = False
+        punishment.save()
+        daily_fields = ("day", "punished_by_uuid", "created", "revoked")
+        daily = table(PunishmentDailyStats, *daily_fields)
+        expiry = sorted(
+            PunishmentExpiryStats.objects.filter(active__gt=0).values_list("day")
+        )
+
+        PunishmentDailyStats.objects.all().delete()
+        stats.rebuild()
+
+        self.assertEqual(table(PunishmentDailyStats, *daily_fields), daily)
+        self.assertEqual(table(PunishmentExpiryStats, "day"), expiry)
+        self.assertEqual(stats.active_count(), 2)
+
+
+class PunishmentStatsApiTests(MojangStubMixin, TestCase):
+    """Test the punishment statistics endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_stats(self):
+        """Test retrieving totals, optionally for some moderators only"""
+        sample_punishment()
+        sample_punishment(mc_username="Notch", punished_by="Notch")
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["active"], 2)
+        self.assertEqual(res.data["until"], timezone.localdate())
+        self.assertEqual(len(res.data["moderators"]), 2)
+
+        res = self.client.get(STATS_URL, {"punished_by_uuid": NOTCH_UUID})
+
+        self.assertEqual(
+            [row["punished_by"] for row in res.data["moderators"]], ["Notch"]
+        )
+        self.assertEqual(res.data["daily"][0]["created"], 1)
+
+    def test_invalid_range(self):
+        """Test that invalid dates or UUIDs are rejected"""
+        invalid = (
+            {"since": "yesterday"},
+            {"until": "abc"},
+            {"until": "2020-02-30"},
+            {"since": "2020-01-02", "until": "2020-01-01"},
+            {"punished_by_uuid": "nope"},
+        )
+        for params in invalid:
+            res = self.client.get(STATS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
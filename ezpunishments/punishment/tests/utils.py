@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ezpunishments.core.models import Punishment
+
+
+def sample_punishment(**params):
+    """Create and return a sample punishment"""
+    defaults = {
+        "mc_username": "SamieMarie",
+        "reason": "Being a noob",
+        "proof": "https://someproofhere.com/proof",
+        "punished_by": "smiileyface",
+        "expires": timezone.now() + timedelta(days=7),
+    }
+    defaults.update(params)
+
+    return Punishment.objects.create(**defaults)
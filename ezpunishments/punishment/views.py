@@ -1,24 +1,394 @@
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import quote_etag
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from ezpunishments.core.models import Punishment
-from . import serializers
+from ezpunishments.core.models import Punishment, UUIDResolutionJob, get_mc_uuids
+from ezpunishments.core.mojang import MojangUnavailable, normalize_uuid
+from ezpunishments.user.authentication import (
+    CachedTokenAuthentication,
+    ServiceTokenAuthentication,
+)
+from ezpunishments.user.permissions import ServiceTokenScope
+from . import (
+    bans,
+    conditional,
+    events,
+    export,
+    search,
+    serializers,
+    snapshot,
+    stats,
+    sync,
+)
+from .encoders import get_row_encoder
+from .filters import PunishmentFilterBackend, get_values
+from .pagination import PunishmentCursorPagination, PunishmentSearchPagination
 
 
 class PunishmentViewSet(viewsets.ModelViewSet):
     serializer_class = serializers.PunishmentSerializer
     queryset = Punishment.objects.all()
-    authentication__classes = (TokenAuthentication,)
-    permission_classes = (IsAuthenticated,)
+    authentication_classes = (CachedTokenAuthentication, ServiceTokenAuthentication)
+    permission_classes = (IsAuthenticated, ServiceTokenScope)
+    pagination_class = PunishmentCursorPagination
+    filter_backends = (PunishmentFilterBackend,)
+    read_scope = "punishments:read"
+    write_scope = "punishments:write"
+    read_only_actions = ("check_many",)
+    fields_param = "fields"
+    sparse_actions = ("list", "retrieve", "export", "changes", "search_punishments")
+    history_actions = ("list", "retrieve")
 
-    def get_queryset(self):
-        mc_usernames = self.request.query_params.get("mc_username")
-        punished_by = self.request.query_params.get("punished_by")
-        queryset = self.queryset
-        if mc_usernames:
-            queryset = queryset.filter(mc_username__in=mc_usernames)
-        if punished_by:
-            queryset = queryset.filter(punished_by__in=punished_by)
+    def get_requested_fields(self):
+        """Returns the fields asked for with ?fields=, or None for all of them"""
+        if self.action not in self.sparse_actions:
+            return None
+        requested = get_values(self.request, self.fields_param)
+        if not requested:
+            return None
+        available = get_row_encoder(self.serializer_class).names
+        unknown = sorted(set(requested) - set(available))
+        if unknown:
+            raise ValidationError(
+                {self.fields_param: [f"Unknown fields: {', '.join(unknown)}"]}
+            )
+
+        return frozenset(requested)
 
+    def get_row_encoder(self):
+        return get_row_encoder(self.serializer_class, self.get_requested_fields())
+
+    def get_queryset(self):
+        """Only load the requested columns when retrieving a punishment"""
+        queryset = super().get_queryset()
+        if self.action == "retrieve" and self.get_requested_fields():
+            # last_updated is always needed for the ETag
+            queryset = queryset.only(*self.get_row_encoder().sources, "last_updated")
         return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        """List punishments straight from values() rows, skipping the serializer"""
+        encoder = self.get_row_encoder()
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = conditional.list_validators(request, queryset)
+        response = conditional.not_modified(request, etag, None)
+        if response is not None:
+            return response
+
+        # The cursor is built from the ordering columns, requested or not
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        sources = dict.fromkeys(
+            encoder.sources + tuple(field.lstrip("-") for field in ordering)
+        )
+        page = self.paginate_queryset(queryset.values(*sources))
+        response = self.get_paginated_response(encoder.encode_all(page))
+
+        return conditional.set_validators(response, etag, None)
+
+    def create(self, request, *args, **kwargs):
+        """Create a punishment, leaving UUIDs to a background job if asked to
+
+        Clients opt in with a Prefer: respond-async header. If a UUID isn't
+        already known the punishment is saved without it and a 202 pointing
+        at the resolution status is returned instead of waiting on Mojang.
+        """
+        if not self.prefers_async(request):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        punishment = Punishment.objects.create_pending(**serializer.validated_data)
+        if not hasattr(punishment, "uuid_resolution"):
+            return Response(
+                self.get_serializer(punishment).data, status=status.HTTP_201_CREATED
+            )
+
+        status_url = request.build_absolute_uri(
+            reverse("punishment:punishment-resolution", args=[punishment.pk])
+        )
+        return Response(
+            self.get_resolution_data(punishment, punishment.uuid_resolution),
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url, "Preference-Applied": "respond-async"},
+        )
+
+    def prefers_async(self, request):
+        preferences = request.headers.get("Prefer", "").lower()
+        return settings.PUNISHMENT_ASYNC_CREATE or "respond-async" in preferences
+
+    def get_resolution_data(self, punishment, job):
+        if job is None:
+            return {
+                "status": "resolved",
+                "punishment": self.get_serializer(punishment).data,
+            }
+        return {
+            "status": job.status,
+            "attempts": job.attempts,
+            "last_error": job.last_error,
+            "punishment": self.get_serializer(punishment).data,
+        }
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return a punishment, or a 304 if the client's copy is still current"""
+        instance = self.get_object()
+        etag, last_modified = conditional.instance_validators(request, instance)
+        response = conditional.not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+
+        return conditional.set_validators(response, etag, last_modified)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Create many punishments at once, returning a result for each"""
+        if not isinstance(request.data, list):
+            return Response(
+                {"detail": "Expected a list of punishments"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > settings.PUNISHMENT_BULK_MAX:
+            return Response(
+                {"detail": f"At most {settings.PUNISHMENT_BULK_MAX} punishments"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(request.data)
+        valid = []
+        for index, item in enumerate(request.data):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {"status": 400, "errors": serializer.errors}
+
+        try:
+            mc_uuids = get_mc_uuids(
+                [data["mc_username"] for _, data in valid]
+                + [data["punished_by"] for _, data in valid]
+            )
+        except MojangUnavailable:
+            return Response(
+                {"detail": "Unable to resolve MC usernames, try again later"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        resolvable = []
+        for index, data in valid:
+            errors = {
+                field: ["Users must have a valid MC username"]
+                for field in ("mc_username", "punished_by")
+                if data[field] not in mc_uuids
+            }
+            if errors:
+                results[index] = {"status": 400, "errors": errors}
+            else:
+                resolvable.append((index, data))
+
+        punishments = Punishment.objects.create_many(
+            [data for _, data in resolvable], mc_uuids=mc_uuids
+        )
+        bans.invalidate([punishment.mc_uuid for punishment in punishments])
+        # bulk_create doesn't send post_save
+        events.publish("created", punishments)
+        stats.record_created(punishments)
+        for (index, _), punishment in zip(resolvable, punishments):
+            results[index] = {
+                "status": 201,
+                "data": self.get_serializer(punishment).data,
+            }
+
+        if not punishments:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(punishments) < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response(results, status=response_status)
+
+    @action(detail=False, url_path=r"check/(?P<mc_uuid>[0-9a-fA-F-]+)")
+    def check(self, request, mc_uuid=None):
+        """Return the currently effective punishment for a MC UUID, if any"""
+        try:
+            mc_uuid = normalize_uuid(mc_uuid)
+        except ValueError:
+            return Response(
+                {"detail": "Invalid MC UUID"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        punishment = bans.get_active_punishment(mc_uuid)
+
+        return Response(
+            {
+                "mc_uuid": mc_uuid,
+                "punished": punishment is not None,
+                "punishment": punishment,
+            }
+        )
+
+    @action(detail=False, methods=["post"], url_path="check")
+    def check_many(self, request):
+        """Return the currently effective punishment for each punished MC UUID"""
+        mc_uuids = (
+            request.data.get("mc_uuids") if isinstance(request.data, dict) else None
+        )
+        if not isinstance(mc_uuids, list):
+            return Response(
+                {"detail": "Expected a list of MC UUIDs in mc_uuids"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(mc_uuids) > settings.PUNISHMENT_CHECK_BATCH_MAX:
+            return Response(
+                {"detail": f"At most {settings.PUNISHMENT_CHECK_BATCH_MAX} MC UUIDs"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            mc_uuids = [normalize_uuid(mc_uuid) for mc_uuid in mc_uuids]
+        except ValueError:
+            return Response(
+                {"detail": "Invalid MC UUID"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({"punished": bans.get_active_punishments(mc_uuids)})
+
+    @action(detail=False)
+    def changes(self, request):
+        """Return the punishments saved or deleted since the given cursor"""
+        try:
+            page = sync.get_changes(
+                self.get_row_encoder(), request.query_params.get("since")
+            )
+        except ValueError:
+            return Response(
+                {"detail": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(page)
+
+    @action(detail=True)
+    def resolution(self, request, pk=None):
+        """Return whether the punishment's UUIDs have been resolved yet"""
+        punishment = self.get_object()
+        job = UUIDResolutionJob.objects.filter(punishment=punishment).first()
+
+        return Response(self.get_resolution_data(punishment, job))
+
+    @action(detail=False, url_path="search")
+    def search_punishments(self, request):
+        """Return punishments whose reason or proof match ?q=, best match first"""
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"q": ["This query parameter is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        encoder = self.get_row_encoder()
+        queryset = search.search(self.filter_queryset(self.get_queryset()), text)
+        paginator = PunishmentSearchPagination()
+        page = paginator.paginate_queryset(
+            queryset.values(*encoder.sources), request, view=self
+        )
+
+        return paginator.get_paginated_response(encoder.encode_all(page))
+
+    def get_date_param(self, param, default):
+        """Returns the date given as ?param=YYYY-MM-DD, or default if missing"""
+        value = self.request.query_params.get(param)
+        if not value:
+            return default
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({param: ["Enter a date as YYYY-MM-DD."]})
+
+        return parsed
+
+    @action(detail=False, url_path="stats")
+    def punishment_stats(self, request):
+        """Return dashboard totals read from the summary tables"""
+        until = self.get_date_param("until", timezone.localdate())
+        since = self.get_date_param(
+            "since", until - timedelta(days=settings.PUNISHMENT_STATS_DAYS - 1)
+        )
+        if since > until:
+            raise ValidationError({"since": ["Must not be after until."]})
+        try:
+            punished_by_uuids = [
+                normalize_uuid(value)
+                for value in get_values(request, "punished_by_uuid")
+            ]
+        except ValueError:
+            raise ValidationError({"punished_by_uuid": ["Invalid MC UUID."]})
+
+        return Response(
+            {
+                "since": since,
+                "until": until,
+                **stats.summary(since, until, punished_by_uuids),
+            }
+        )
+
+    @action(detail=False, url_path="snapshot")
+    def ban_snapshot(self, request):
+        """Return the binary snapshot of active bans built by build_ban_snapshot
+
+        The file is opened once, so it's served whole even if a new version
+        replaces it meanwhile.
+        """
+        try:
+            snapshot_file = open(settings.PUNISHMENT_SNAPSHOT_PATH, "rb")
+        except FileNotFoundError:
+            return Response(
+                {"detail": "The ban snapshot hasn't been built yet"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        try:
+            header = snapshot.read_header(snapshot_file)
+        except ValueError:
+            snapshot_file.close()
+            return Response(
+                {"detail": "The ban snapshot is unreadable"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        snapshot_file.seek(0)
+
+        etag = quote_etag(f"bans-{header['version']}")
+        response = conditional.not_modified(request, etag, header["generated_at"])
+        if response is not None:
+            snapshot_file.close()
+        else:
+            response = FileResponse(snapshot_file, content_type=snapshot.CONTENT_TYPE)
+
+        return conditional.set_validators(response, etag, header["generated_at"])
+
+    @action(detail=False, url_path=r"export/(?P<export_format>ndjson|csv)")
+    def export(self, request, export_format=None):
+        """Stream every matching punishment as NDJSON or CSV"""
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export.export_lines(
+                queryset, export_format, fields=self.get_requested_fields()
+            ),
+            content_type=export.CONTENT_TYPES[export_format],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="punishments.{export_format}"'
+
+        return response
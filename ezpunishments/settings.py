@@ -40,14 +40,16 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "ezpunishments.core",
-    "ezpunishments.user",
-    "ezpunishments.punishment",
+    "ezpunishments.user.apps.UserConfig",
+    "ezpunishments.punishment.apps.PunishmentConfig",
 ]
 
 MIDDLEWARE = [
+    "ezpunishments.core.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -92,6 +94,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+#
+# Cached token lookups and ban checks are invalidated by deleting their keys,
+# which only reaches the cache of the worker that made the change. With more
+# than one worker process CACHE_BACKEND must be a shared cache such as
+# django.core.cache.backends.memcached.PyLibMCCache. Otherwise the other
+# workers keep accepting deleted tokens for up to AUTH_TOKEN_CACHE_TTL and
+# serving stale ban checks for up to PUNISHMENT_CHECK_CACHE_TTL.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -131,3 +153,127 @@ USE_TZ = True
 STATIC_URL = "/static/"
 
 AUTH_USER_MODEL = "core.User"
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "ezpunishments.user.authentication.CachedTokenAuthentication",
+        "ezpunishments.user.authentication.ServiceTokenAuthentication",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "ezpunishments.core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+}
+
+AUTH_TOKEN_CACHE_TTL = 60
+
+
+# Service tokens
+# Rotate keys by adding a new id, switching SERVICE_TOKEN_KEY_ID to it and
+# removing the old key once SERVICE_TOKEN_TTL has passed.
+
+SERVICE_TOKEN_KEYS = {
+    "1": os.environ.get("SERVICE_TOKEN_KEY", SECRET_KEY),
+}
+
+SERVICE_TOKEN_KEY_ID = os.environ.get("SERVICE_TOKEN_KEY_ID", "1")
+
+SERVICE_TOKEN_TTL = 60 * 15
+
+SERVICE_TOKEN_SCOPES = ("punishments:read", "punishments:write")
+
+
+# Mojang API
+
+MOJANG_API_URL = os.environ.get("MOJANG_API_URL", "https://api.mojang.com")
+
+MOJANG_UUID_CACHE_SIZE = 4096
+
+MOJANG_UUID_CACHE_TTL = 60 * 5
+
+MOJANG_PROFILE_TTL = 60 * 60 * 24
+
+MOJANG_CONNECT_TIMEOUT = 1.0
+
+MOJANG_READ_TIMEOUT = 2.0
+
+MOJANG_POOL_SIZE = 10
+
+MOJANG_BREAKER_THRESHOLD = 5
+
+MOJANG_BREAKER_RESET = 30
+
+MOJANG_BATCH_SIZE = 10
+
+MOJANG_BATCH_CONCURRENCY = 4
+
+
+# Punishments
+
+PUNISHMENT_BULK_MAX = 1000
+
+PUNISHMENT_BULK_BATCH_SIZE = 500
+
+PUNISHMENT_CHECK_CACHE_TTL = 30
+
+PUNISHMENT_CHECK_BATCH_MAX = 5000
+
+PUNISHMENT_EXPORT_CHUNK_SIZE = 2000
+
+PUNISHMENT_CHANGES_PAGE_SIZE = 1000
+
+# Seconds the changes feed stays behind now, so rows saved by transactions
+# that commit out of order aren't skipped over
+PUNISHMENT_CHANGES_LAG = 2
+
+# Server-Sent Events stream of punishment changes, served by the ASGI app
+PUNISHMENT_EVENTS_PATH = "/api/punishment/events/"
+
+PUNISHMENT_EVENTS_BROKER = "ezpunishments.punishment.events.InMemoryBroker"
+
+PUNISHMENT_EVENTS_QUEUE_SIZE = 1000
+
+PUNISHMENT_EVENTS_KEEPALIVE = 15
+
+PUNISHMENT_SNAPSHOT_PATH = os.environ.get(
+    "PUNISHMENT_SNAPSHOT_PATH", str(BASE_DIR / "var" / "bans.snapshot")
+)
+
+# Inactive punishments untouched for this many days, and any that expired
+# this long ago, are moved to the archive by archive_punishments
+PUNISHMENT_ARCHIVE_AFTER_DAYS = 30
+
+PUNISHMENT_ARCHIVE_BATCH_SIZE = 1000
+
+# Days covered by the stats endpoint when no range is given
+PUNISHMENT_STATS_DAYS = 30
+
+# Queued UUID lookups taken by one resolve_uuids batch
+PUNISHMENT_RESOLVE_BATCH_SIZE = 100
+
+# Times a lookup is tried while Mojang is unavailable before giving up
+PUNISHMENT_RESOLVE_MAX_ATTEMPTS = 10
+
+# Seconds before the first retry, doubled for every retry after it
+PUNISHMENT_RESOLVE_RETRY_DELAY = 5
+
+PUNISHMENT_RESOLVE_MAX_DELAY = 60 * 10
+
+# Seconds a batch has to look up its UUIDs before other workers may take it
+PUNISHMENT_RESOLVE_LEASE = 60 * 2
+
+# Whether punishments are created asynchronously without Prefer: respond-async
+PUNISHMENT_ASYNC_CREATE = False
+
+
+# Metrics
+
+# Whether responses say where their time went in a Server-Timing header
+METRICS_SERVER_TIMING = True
+
+# Bearer token required to scrape /metrics/, which is disabled when unset
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
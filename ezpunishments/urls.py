@@ -16,8 +16,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from ezpunishments.core.views import export_metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", export_metrics, name="metrics"),
     path("api/user/", include("ezpunishments.user.urls")),
     path("/api/punishment/", include("ezpunishments.punishment.urls")),
 ]
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class UserConfig(AppConfig):
-    name = "user"
+    name = "ezpunishments.user"
+
+    def ready(self):
+        from . import signals  # noqa: F401
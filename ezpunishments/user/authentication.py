@@ -0,0 +1,76 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from ezpunishments.user import service_tokens
+
+
+def token_cache_key(key):
+    """Returns the cache key for a token without exposing the token itself"""
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches which user a token belongs to
+
+    Only the user's id is cached, never the user with its password hash.
+    The user is read by primary key on every request, so deactivation
+    applies straight away on every worker.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        user_id = cache.get(cache_key)
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, user.pk, settings.AUTH_TOKEN_CACHE_TTL)
+            return user, token
+
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return user, self.get_model()(key=key, user=user)
+
+
+def invalidate_tokens(keys):
+    """Drops cached credentials for the given token keys"""
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class ServiceTokenAuthentication(BaseAuthentication):
+    """Authenticates signed service tokens without touching the database
+
+    Clients authenticate by passing the token in the Authorization header:
+
+        Authorization: Bearer <service token>
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+
+        try:
+            token = service_tokens.verify(auth[1].decode())
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(_("Invalid or expired token."))
+
+        return service_tokens.ServiceUser(token), token
+
+    def authenticate_header(self, request):
+        return self.keyword
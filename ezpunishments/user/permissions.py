@@ -0,0 +1,21 @@
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+from ezpunishments.user.service_tokens import ServiceToken
+
+
+class ServiceTokenScope(BasePermission):
+    """Limits service tokens to the scopes they were issued with
+
+    Views name the scopes they need with read_scope and write_scope. Actions
+    listed in read_only_actions only need the read scope whatever the method.
+    """
+
+    def has_permission(self, request, view):
+        if not isinstance(request.auth, ServiceToken):
+            return True
+        is_read = request.method in SAFE_METHODS or getattr(
+            view, "action", None
+        ) in getattr(view, "read_only_actions", ())
+        scope = view.read_scope if is_read else view.write_scope
+
+        return request.auth.has_scope(scope)
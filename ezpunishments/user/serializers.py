@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
 
+from ezpunishments.core.serializers import MCUUIDModelSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(MCUUIDModelSerializer):
     """Serializer fro the user object"""
 
     class Meta:
@@ -41,6 +44,11 @@ class AuthTokenSerializer(serializers.Serializer):
     password = serializers.CharField(
         style={"input_type": "password"}, trim_whitespace=False
     )
+    scopes = serializers.ListField(
+        child=serializers.ChoiceField(choices=settings.SERVICE_TOKEN_SCOPES),
+        required=False,
+        allow_empty=False,
+    )
 
     def validate(self, attrs):
         """Validate and authenticate the user"""
@@ -0,0 +1,155 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from ezpunishments.core.tests.utils import MojangStubMixin
+from ezpunishments.user import service_tokens
+from ezpunishments.user.authentication import token_cache_key
+
+
+PROFILE_URL = reverse("user:profile")
+PUNISHMENT_URL = reverse("punishment:punishment-list")
+
+
+class CachedTokenAuthenticationTests(MojangStubMixin, TestCase):
+    """Test authenticating with cached tokens"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_is_cached(self):
+        """Test that a token is only looked up in the database once"""
+        self.client.get(PROFILE_URL)
+
+        # Only the user itself is read again
+        with self.assertNumQueries(1):
+            res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["username"], self.user.username)
+
+    def test_cached_lookup_holds_only_user_id(self):
+        """Test that the password hash isn't copied into the cache"""
+        self.client.get(PROFILE_URL)
+
+        self.assertEqual(cache.get(token_cache_key(self.token.key)), self.user.pk)
+
+    def test_deleted_token_is_rejected(self):
+        """Test that deleting a token invalidates the cached lookup"""
+        self.client.get(PROFILE_URL)
+
+        self.token.delete()
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating a user invalidates the cached lookup"""
+        self.client.get(PROFILE_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_deactivated_elsewhere_is_rejected(self):
+        """Test that deactivation applies without the cached lookup being dropped"""
+        self.client.get(PROFILE_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_is_rejected(self):
+        """Test that unknown tokens are rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ServiceTokenAuthenticationTests(MojangStubMixin, TestCase):
+    """Test authenticating with signed service tokens"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username="smiileyface", password="Testpass123"
+        )
+        self.client = APIClient()
+
+    def authenticate(self, scopes):
+        token = service_tokens.issue(self.user, scopes)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_service_token_skips_database(self):
+        """Test that a service token is verified without any queries"""
+        self.authenticate(["punishments:read"])
+
+        # Only the two ETag queries and the page itself
+        with self.assertNumQueries(3):
+            res = self.client.get(PUNISHMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_service_token_scopes_enforced(self):
+        """Test that writes need the write scope"""
+        self.authenticate(["punishments:read"])
+
+        res = self.client.post(PUNISHMENT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_service_token_not_accepted_for_profile(self):
+        """Test that service tokens can't manage the user profile"""
+        self.authenticate(["punishments:read", "punishments:write"])
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tampered_service_token_rejected(self):
+        """Test that a token with a modified payload is rejected"""
+        token = service_tokens.issue(self.user, ["punishments:read"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token[:-2]}xx")
+
+        res = self.client.get(PUNISHMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SERVICE_TOKEN_TTL=-1)
+    def test_expired_service_token_rejected(self):
+        """Test that an expired token is rejected"""
+        self.authenticate(["punishments:read"])
+
+        res = self.client.get(PUNISHMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_service_token_key_rotation(self):
+        """Test that tokens from a retired key work until the key is removed"""
+        with self.settings(SERVICE_TOKEN_KEYS={"1": "old"}, SERVICE_TOKEN_KEY_ID="1"):
+            self.authenticate(["punishments:read"])
+
+        with self.settings(SERVICE_TOKEN_KEYS={"1": "old", "2": "new"}):
+            res = self.client.get(PUNISHMENT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.settings(SERVICE_TOKEN_KEYS={"2": "new"}):
+            res = self.client.get(PUNISHMENT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -5,6 +5,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from ezpunishments.core.tests.utils import MojangStubMixin
+
 
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token")
@@ -16,10 +18,11 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicUserApiTests(TestCase):
+class PublicUserApiTests(MojangStubMixin, TestCase):
     """Test the publicly available user API endpoints"""
 
     def setUp(self):
+        super().setUp()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -63,6 +66,32 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn("token", res.data)
 
+    def test_create_service_token_for_user(self):
+        """Test that a service token is issued when scopes are requested"""
+        payload = {"username": "smiileyface", "password": "Testpass123"}
+        create_user(**payload)
+
+        res = self.client.post(
+            TOKEN_URL, {**payload, "scopes": ["punishments:read"]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("token", res.data)
+        self.assertIn("service_token", res.data)
+        self.assertIn("expires_in", res.data)
+
+    def test_create_service_token_invalid_scope(self):
+        """Test that a service token isn't issued for unknown scopes"""
+        payload = {"username": "smiileyface", "password": "Testpass123"}
+        create_user(**payload)
+
+        res = self.client.post(
+            TOKEN_URL, {**payload, "scopes": ["everything"]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("service_token", res.data)
+
     def test_create_token_invalid_credentials(self):
         """Test that a token is not created if invalid credentials are given"""
         create_user(username="smiileyface", password="Testpass123")
@@ -97,10 +126,11 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateUserApiTests(TestCase):
+class PrivateUserApiTests(MojangStubMixin, TestCase):
     """Test user API endpoints that require authentication"""
 
     def setUp(self):
+        super().setUp()
         self.user = create_user(username="smiileyface", password="Testpass123")
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
@@ -130,3 +160,18 @@ class PrivateUserApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertTrue(self.user.check_password(payload["password"]))
+
+
+class MojangOutageUserApiTests(MojangStubMixin, TestCase):
+    """Test registering while Mojang is unavailable"""
+
+    mojang_status_code = 503
+
+    def test_create_user_unavailable(self):
+        """Test that registering fails with a 503 instead of a server error"""
+        res = APIClient().post(
+            CREATE_USER_URL, {"username": "smiileyface", "password": "Testpass123"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(get_user_model().objects.exists())
@@ -1,7 +1,12 @@
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from rest_framework import generics, permissions
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from ezpunishments.user import service_tokens
+from ezpunishments.user.authentication import CachedTokenAuthentication
 from ezpunishments.user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -17,12 +22,29 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        """Return the user's token, plus a signed service token if scopes are given"""
+        serializer = self.serializer_class(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+        token, created = Token.objects.get_or_create(user=user)
+        data = {"token": token.key}
+
+        scopes = serializer.validated_data.get("scopes")
+        if scopes:
+            data["service_token"] = service_tokens.issue(user, scopes)
+            data["expires_in"] = settings.SERVICE_TOKEN_TTL
+
+        return Response(data)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):